@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Bounded-memory counting for the word-count style jobs.
+
+InMapperCombiner is the map side of in-mapper combining: partial counts are
+kept in a dict with a memory budget and emitted as word<TAB>count records,
+part of the table at a time when the budget is hit and the rest at the end
+of the input. The reducers add partial counts exactly like ordinary counts.
+
+SpillingCounter is the reduce side for input in any order: a dict with a
+memory budget that is written to disk as a sorted run of partial counts when
+it grows past the budget; at the end the runs are merged and summed.
+
+    from counting import InMapperCombiner, SpillingCounter
+    combiner = InMapperCombiner(memory_mb=64, evict='oldest')
+    for word in words:
+        combiner.add(word)
+    combiner.flush()
+
+    counter = SpillingCounter(memory_mb=64)
+    for word, count in pairs:
+        counter.add(word, count)
+    for word, count in counter.items(sort=True):
+        print(f"{word}\t{count}")
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from heapq import merge, nlargest
+from itertools import groupby, islice
+
+
+class InMapperCombiner:
+    """
+    In-mapper combining: keeps partial counts in a bounded dict and emits
+    partial sums (word<TAB>count) instead of one word<TAB>1 per token.
+    The reducer adds partial counts exactly like ordinary counts.
+    """
+
+    ENTRY_OVERHEAD = 100   # approx. bytes per dict entry incl. str and int objects
+    FLUSH_FRACTION = 0.5   # share of the table flushed when the budget is hit
+
+    def __init__(self, memory_mb=64, evict='oldest', out=None):
+        self.counts = {}
+        self.budget = int(memory_mb * 1024 * 1024)
+        self.used = 0
+        self.evict = evict
+        self.out = out if out is not None else sys.stdout
+
+    def add(self, word, count=1):
+        counts = self.counts
+        if word in counts:
+            counts[word] += count
+        else:
+            counts[word] = count
+            self.used += len(word) + self.ENTRY_OVERHEAD
+            if self.used > self.budget:
+                self.flush_some()
+
+    def flush_some(self):
+        """Emit and drop part of the table: the oldest or the heaviest entries"""
+        n = max(1, int(len(self.counts) * self.FLUSH_FRACTION))
+        if self.evict == 'heaviest':
+            victims = [word for word, _ in nlargest(n, self.counts.items(), key=lambda item: item[1])]
+        else:
+            # dicts keep insertion order, so the first keys are the oldest
+            victims = list(islice(self.counts, n))
+        for word in victims:
+            self.out.write(f"{word}\t{self.counts.pop(word)}\n")
+            self.used -= len(word) + self.ENTRY_OVERHEAD
+
+    def flush(self):
+        """Emit everything that is left (end of input)"""
+        for word, count in self.counts.items():
+            self.out.write(f"{word}\t{count}\n")
+        self.counts.clear()
+        self.used = 0
+
+
+class SpillingCounter:
+    """
+    Hash aggregation for unsorted input with a memory budget.
+    When the table grows past the budget it is written out as a sorted run
+    of partial counts; at the end the runs are merged and summed, so memory
+    no longer grows with the vocabulary.
+    """
+
+    ENTRY_OVERHEAD = 100   # approx. bytes per dict entry incl. str and int objects
+
+    def __init__(self, memory_mb=64, tmp_dir=None):
+        self.counts = {}
+        self.budget = int(memory_mb * 1024 * 1024)
+        self.used = 0
+        self.tmp_dir = tmp_dir
+        self.work_dir = None
+        self.runs = []
+
+    def add(self, word, count):
+        counts = self.counts
+        if word in counts:
+            counts[word] += count
+        else:
+            counts[word] = count
+            self.used += len(word) + self.ENTRY_OVERHEAD
+            if self.used > self.budget:
+                self.spill()
+
+    def spill(self):
+        if self.work_dir is None:
+            self.work_dir = tempfile.mkdtemp(prefix='wordcount-', dir=self.tmp_dir)
+        path = os.path.join(self.work_dir, f"run-{len(self.runs):05d}")
+        with open(path, 'w') as f:
+            for word in sorted(self.counts):
+                f.write(f"{word}\t{self.counts[word]}\n")
+        self.runs.append(path)
+        self.counts = {}
+        self.used = 0
+
+    def items(self, sort=False):
+        """(word, count) pairs: sorted by word if sort or anything was spilled, else table order"""
+        if not self.runs:
+            if sort:
+                for word in sorted(self.counts):
+                    yield word, self.counts[word]
+            else:
+                yield from self.counts.items()
+            return
+
+        self.spill()
+        files = [open(path) for path in self.runs]
+        try:
+            merged = merge(*files, key=lambda line: line.split('\t', 1)[0])
+            for word, lines in groupby(merged, key=lambda line: line.split('\t', 1)[0]):
+                yield word, sum(int(line.split('\t', 1)[1]) for line in lines)
+        finally:
+            for f in files:
+                f.close()
+            shutil.rmtree(self.work_dir, ignore_errors=True)
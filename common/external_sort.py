@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Bounded-memory external merge sort for map output, with the key semantics of
+Hadoop's KeyFieldBasedComparator.
+
+Lines are buffered up to a memory budget, sorted and spilled to temporary run
+files, then the runs are k-way merged (in several passes if there are more
+runs than the merge factor). The comparator works like on the cluster:
+
+* the key is the first N fields of the line (stream.num.map.output.key.fields)
+* -k options select key fields and characters, as for Unix sort:
+  -k2,2  -k1.3,1.5  -k3n  -k2,2nr
+* n sorts numerically, r reverses, per -k option or globally with -n / -r
+* without -k options whole keys are compared byte by byte
+
+Replaces `sort -k1,1` in the local pipelines, e.g. for the IoT job:
+    cat iot_sensor_data.json | python3 mapper.py \\
+        | python3 ../../common/external_sort.py -S 64 \\
+        | python3 reducer.py
+
+and the secondary sort of lab3 3.6 (composite key, time as second key field):
+    python3 ../../common/external_sort.py --key-fields 2 -k1,1 -k2,2
+"""
+
+import argparse
+import heapq
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+# Rough Python overhead of a buffered line plus its sort key, in bytes
+LINE_OVERHEAD = 120
+
+KEY_OPTION = re.compile(rb'-k\s*(\d+)(?:\.(\d+))?([nr]*)(?:,(\d+)(?:\.(\d+))?([nr]*))?')
+GLOBAL_OPTION = re.compile(rb'(?:^|\s)-([nr]+)(?=\s|$)')
+LEADING_NUMBER = re.compile(rb'\s*[-+]?(?:\d+\.?\d*|\.\d+)')
+
+
+class Reversed:
+    """Wraps a byte string so that it sorts in descending order"""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def leading_number(text):
+    """Numeric value of a field the way sort -n reads it (non-numbers are 0)"""
+    match = LEADING_NUMBER.match(text)
+    return float(match.group()) if match else 0.0
+
+
+class KeySpec:
+    """
+    One -k option: a range of key fields/characters plus n/r flags.
+    """
+
+    def __init__(self, start_field, start_char=1, end_field=0, end_char=0, numeric=False, reverse=False):
+        self.start_field = start_field
+        self.start_char = start_char or 1
+        self.end_field = end_field        # 0 means "to the end of the key"
+        self.end_char = end_char          # 0 means "to the end of the field"
+        self.numeric = numeric
+        self.reverse = reverse
+
+    def extract(self, fields, sep):
+        """Bytes of the key selected by this spec"""
+        if self.start_field > len(fields):
+            return b''
+        end_field = len(fields) if not self.end_field else min(self.end_field, len(fields))
+        if end_field < self.start_field:
+            return b''
+        parts = fields[self.start_field - 1:end_field]
+        if self.end_char and end_field == self.end_field:
+            parts[-1] = parts[-1][:self.end_char]
+        return sep.join(parts)[self.start_char - 1:]
+
+    def sort_key(self, text):
+        if self.numeric:
+            value = leading_number(text)
+            return -value if self.reverse else value
+        return Reversed(text) if self.reverse else text
+
+
+class KeyFieldComparator:
+    """
+    Builds sort keys for map output lines, like KeyFieldBasedComparator.
+
+    options: the mapreduce.partition.keycomparator.options string, e.g. "-k1,1 -k2,2nr"
+    num_key_fields: stream.num.map.output.key.fields
+    """
+
+    def __init__(self, options='', num_key_fields=1, field_separator=b'\t', key_field_separator=b'\t'):
+        if isinstance(options, str):
+            options = options.encode('utf-8')
+        self.num_key_fields = num_key_fields
+        self.field_separator = field_separator
+        self.key_field_separator = key_field_separator
+
+        global_flags = b''.join(GLOBAL_OPTION.findall(options))
+        self.numeric = b'n' in global_flags
+        self.reverse = b'r' in global_flags
+        self.specs = []
+        for sf, sc, sflags, ef, ec, eflags in KEY_OPTION.findall(options):
+            flags = sflags + eflags
+            # As in sort, a -k option without its own flags inherits the global ones
+            numeric, reverse = (b'n' in flags, b'r' in flags) if flags else (self.numeric, self.reverse)
+            self.specs.append(KeySpec(int(sf), int(sc or 1), int(ef or 0), int(ec or 0), numeric, reverse))
+
+    def key(self, line):
+        """The map output key of a line (first num_key_fields fields)"""
+        sep = self.field_separator
+        pos = -len(sep)
+        for _ in range(self.num_key_fields):
+            pos = line.find(sep, pos + len(sep))
+            if pos < 0:
+                return line.rstrip(b'\r\n')
+        return line[:pos]
+
+    def sort_key_function(self):
+        """A function suitable for list.sort(key=...) and heapq.merge(key=...)"""
+        key = self.key
+        if not self.specs:
+            if self.numeric:
+                whole = KeySpec(1, numeric=True, reverse=self.reverse)
+                return lambda line: whole.sort_key(key(line))
+            if self.reverse:
+                return lambda line: Reversed(key(line))
+            return key
+
+        specs = self.specs
+        sep = self.key_field_separator
+
+        def sort_key(line):
+            fields = key(line).split(sep)
+            return tuple(spec.sort_key(spec.extract(fields, sep)) for spec in specs)
+        return sort_key
+
+
+class ExternalSorter:
+    """
+    Sorts an arbitrary number of lines in a fixed memory budget.
+
+    Usage:
+        sorter = ExternalSorter(comparator.sort_key_function(), buffer_mb=100)
+        for line in lines:
+            sorter.add(line)
+        for line in sorter.sorted_lines():
+            ...
+        sorter.close()
+    """
+
+    def __init__(self, key=None, buffer_mb=100, merge_factor=10, tmp_dir=None):
+        self.key = key
+        self.buffer_limit = int(buffer_mb * 1024 * 1024)
+        self.merge_factor = max(2, merge_factor)
+        self.work_dir = tempfile.mkdtemp(prefix='external-sort-', dir=tmp_dir)
+        self.buffer = []
+        self.buffered_bytes = 0
+        self.runs = []
+        self.run_count = 0
+
+    def add(self, line):
+        if not line.endswith(b'\n'):
+            line += b'\n'
+        self.buffer.append(line)
+        self.buffered_bytes += len(line) + LINE_OVERHEAD
+        if self.buffered_bytes >= self.buffer_limit:
+            self.spill()
+
+    def extend(self, lines):
+        for line in lines:
+            self.add(line)
+
+    def new_run_path(self):
+        self.run_count += 1
+        return os.path.join(self.work_dir, f'run-{self.run_count:06d}')
+
+    def spill(self):
+        """Sort the buffer and write it out as one run"""
+        if not self.buffer:
+            return
+        self.buffer.sort(key=self.key)
+        path = self.new_run_path()
+        with open(path, 'wb') as f:
+            f.writelines(self.buffer)
+        self.runs.append(path)
+        self.buffer = []
+        self.buffered_bytes = 0
+
+    def merge_runs(self, paths, out_path):
+        files = [open(p, 'rb') for p in paths]
+        try:
+            with open(out_path, 'wb') as out:
+                out.writelines(heapq.merge(*files, key=self.key))
+        finally:
+            for f in files:
+                f.close()
+        for p in paths:
+            os.remove(p)
+
+    def sorted_lines(self):
+        """Iterate over all added lines in sorted order"""
+        if not self.runs:
+            # Everything fit in memory: no temporary files at all
+            self.buffer.sort(key=self.key)
+            yield from self.buffer
+            return
+
+        self.spill()
+        # Intermediate passes until one final merge can open every run at once
+        while len(self.runs) > self.merge_factor:
+            batch, self.runs = self.runs[:self.merge_factor], self.runs[self.merge_factor:]
+            path = self.new_run_path()
+            self.merge_runs(batch, path)
+            self.runs.append(path)
+
+        files = [open(p, 'rb') for p in self.runs]
+        try:
+            yield from heapq.merge(*files, key=self.key)
+        finally:
+            for f in files:
+                f.close()
+
+    def close(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    """Sort files (or stdin) to stdout"""
+    parser = argparse.ArgumentParser(description="External merge sort with Hadoop key-field semantics")
+    parser.add_argument('files', nargs='*', help="Input files (default: stdin)")
+    parser.add_argument('-k', dest='keys', action='append', default=[], metavar='POS1[,POS2]',
+                        help="Key field range, e.g. 1,1 or 2,2nr (repeatable)")
+    parser.add_argument('-n', action='store_true', help="Numeric comparison")
+    parser.add_argument('-r', action='store_true', help="Reverse the result")
+    parser.add_argument('-t', dest='separator', default='\t', help="Key field separator (default: tab)")
+    parser.add_argument('--key-fields', type=int, default=1,
+                        help="Number of leading fields that form the key (default: 1)")
+    parser.add_argument('-S', '--buffer-mb', type=float, default=100, help="Memory budget in MB (default: 100)")
+    parser.add_argument('-T', '--temporary-directory', help="Directory for spill files")
+    parser.add_argument('--merge-factor', type=int, default=10, help="Runs merged per pass (default: 10)")
+    args = parser.parse_args()
+
+    options = ' '.join([f'-k{k}' for k in args.keys] + (['-n'] if args.n else []) + (['-r'] if args.r else []))
+    separator = args.separator.encode('utf-8')
+    comparator = KeyFieldComparator(options, args.key_fields, separator, separator)
+
+    with ExternalSorter(comparator.sort_key_function(), args.buffer_mb, args.merge_factor,
+                        args.temporary_directory) as sorter:
+        if args.files:
+            for path in args.files:
+                with open(path, 'rb') as f:
+                    sorter.extend(f)
+        else:
+            sorter.extend(sys.stdin.buffer)
+        sys.stdout.buffer.writelines(sorter.sorted_lines())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Compressed input for the lab mappers and the local runner.
+
+Mappers read gzip, bzip2 and xz input directly: the codec is recognised by
+its magic bytes (not the file name), so `cat log.gz | python3 mapper.py`
+and plain text both work:
+
+    from hadoop_input import open_stdin
+    sys.stdin = io.TextIOWrapper(open_stdin(), encoding='latin-1')
+
+A gzip file is normally one stream and can only be read from its start, so
+a whole .gz file goes to a single mapper. `reblock` rewrites any input as a
+multi-member gzip file: every member holds a line-aligned block of about
+--block-mb of text and is a complete gzip stream on its own (the same idea as
+BGZF). A sidecar index FILE.gz.idx lists the member offsets, and
+local_runner.py cuts such files into splits at member boundaries. The output
+is still an ordinary .gz file for gunzip, zcat and Hadoop.
+
+    python3 hadoop_input.py reblock NASA_access_log_Jul95.gz NASA_access_log_Jul95.blocked.gz
+    python3 hadoop_input.py cat NASA_access_log_Jul95.blocked.gz | head
+"""
+
+import argparse
+import bz2
+import gzip
+import io
+import lzma
+import os
+import shutil
+import sys
+
+MAGIC = [
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+]
+MAGIC_LENGTH = max(len(magic) for magic, _ in MAGIC)
+INDEX_SUFFIX = '.idx'
+INDEX_HEADER = '# gzip member index: compressed_offset<TAB>uncompressed_offset'
+COPY_CHUNK = 1 << 20
+
+
+def detect_codec(head):
+    """Codec name for the first bytes of a file, None for uncompressed data"""
+    for magic, codec in MAGIC:
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def file_codec(path):
+    with open(path, 'rb') as f:
+        return detect_codec(f.read(MAGIC_LENGTH))
+
+
+def decompress(raw, codec):
+    """Binary reader over the decompressed data of a binary stream"""
+    if codec == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='rb')
+    if codec == 'bz2':
+        return bz2.BZ2File(raw, mode='rb')
+    if codec == 'xz':
+        return lzma.LZMAFile(raw, mode='rb')
+    return raw
+
+
+def open_input(path):
+    """Binary reader over a plain or compressed file"""
+    codec = file_codec(path)
+    if codec == 'gzip':
+        return gzip.open(path, 'rb')
+    if codec == 'bz2':
+        return bz2.open(path, 'rb')
+    if codec == 'xz':
+        return lzma.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def open_stdin():
+    """
+    Binary reader over stdin, decompressed if it starts with a known magic.
+    Uncompressed input is returned as sys.stdin.buffer itself.
+    """
+    raw = sys.stdin.buffer
+    if not hasattr(raw, 'peek'):
+        raw = io.BufferedReader(raw)
+    head = raw.peek(MAGIC_LENGTH)[:MAGIC_LENGTH]
+    return decompress(raw, detect_codec(head))
+
+
+class RangeReader(io.RawIOBase):
+    """Reads at most `length` bytes of a file starting at `start`"""
+
+    def __init__(self, f, start, length):
+        f.seek(start)
+        self.f = f
+        self.remaining = length
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = min(len(buffer), self.remaining)
+        if n <= 0:
+            return 0
+        data = self.f.read(n)
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+    def close(self):
+        self.f.close()
+        super().close()
+
+
+def read_range(path, start, length, chunk_size=COPY_CHUNK):
+    """
+    Decompressed chunks of one split. For compressed files the range is in
+    compressed bytes and must start at a gzip member (or cover the whole file).
+    """
+    codec = file_codec(path)
+    with io.BufferedReader(RangeReader(open(path, 'rb'), start, length), chunk_size) as raw:
+        with decompress(raw, codec) as reader:
+            while True:
+                chunk = reader.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+
+def index_path(path):
+    return path + INDEX_SUFFIX
+
+
+def read_index(path):
+    """Compressed member offsets of a reblocked gzip file, or None without an index"""
+    idx = index_path(path)
+    if not os.path.exists(idx) or os.path.getmtime(idx) < os.path.getmtime(path):
+        return None
+    offsets = []
+    with open(idx) as f:
+        for line in f:
+            if line.startswith('#') or not line.strip():
+                continue
+            offsets.append(int(line.split('\t', 1)[0]))
+    return offsets
+
+
+def reblock(source, target, block_mb=16, level=6):
+    """
+    Rewrite source (plain or compressed) as gzip members of about block_mb MB
+    of whole lines each and write the member index next to the target.
+    Returns the number of members.
+    """
+    block_size = int(block_mb * 1024 * 1024)
+    offsets = []
+    uncompressed = 0
+    with open_input(source) as src, open(target, 'wb') as out:
+        pending = b''
+        while True:
+            chunk = src.read(block_size)
+            data = pending + chunk
+            if not chunk:
+                block, pending = data, b''
+            else:
+                cut = data.rfind(b'\n')
+                if cut < 0:
+                    pending = data
+                    continue
+                block, pending = data[:cut + 1], data[cut + 1:]
+            if block:
+                offsets.append((out.tell(), uncompressed))
+                out.write(gzip.compress(block, compresslevel=level, mtime=0))
+                uncompressed += len(block)
+            if not chunk:
+                break
+        end = out.tell()
+
+    with open(index_path(target), 'w') as idx:
+        idx.write(INDEX_HEADER + '\n')
+        for compressed_offset, uncompressed_offset in offsets:
+            idx.write(f"{compressed_offset}\t{uncompressed_offset}\n")
+        idx.write(f"# end\t{end}\t{uncompressed}\n")
+    return len(offsets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compressed input helpers for the streaming labs")
+    commands = parser.add_subparsers(dest='command', required=True)
+    reblock_parser = commands.add_parser('reblock', help="Rewrite a file as indexed multi-member gzip")
+    reblock_parser.add_argument('source', help="Plain, gzip, bz2 or xz input")
+    reblock_parser.add_argument('target', help="Output .gz file (index written to TARGET.idx)")
+    reblock_parser.add_argument('--block-mb', type=float, default=16,
+                                help="Uncompressed MB per gzip member (default: 16)")
+    reblock_parser.add_argument('--level', type=int, default=6, help="gzip level (default: 6)")
+    cat_parser = commands.add_parser('cat', help="Decompress files (or stdin) to stdout")
+    cat_parser.add_argument('files', nargs='*')
+    args = parser.parse_args()
+
+    if args.command == 'reblock':
+        members = reblock(args.source, args.target, args.block_mb, args.level)
+        print(f"{args.target}: {members} gzip members, index {index_path(args.target)}", file=sys.stderr)
+    else:
+        out = sys.stdout.buffer
+        if not args.files:
+            shutil.copyfileobj(open_stdin(), out, COPY_CHUNK)
+        for path in args.files:
+            with open_input(path) as src:
+                shutil.copyfileobj(src, out, COPY_CHUNK)
+
+
+if __name__ == "__main__":
+    main()
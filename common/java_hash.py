@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Java hash functions of the Hadoop partitioners, for Python code that has to
+predict which reducer a key lands on.
+
+java_bytes_hash() is WritableComparator.hashBytes(), which
+KeyFieldBasedPartitioner applies field by field (starting from 0) and
+HashPartitioner applies to a Text key (starting from 1); java_string_hash()
+is String.hashCode(). Both return a signed 32-bit Java int, so the reducer is
+
+    from java_hash import java_bytes_hash
+    reducer = (java_bytes_hash(key.encode('utf-8')) & 0x7FFFFFFF) % num_reducers
+"""
+
+INT_MASK = 0xFFFFFFFF
+
+
+def to_int32(value):
+    """Wrap an unbounded Python int to a signed 32-bit Java int"""
+    value &= INT_MASK
+    return value - (1 << 32) if value & 0x80000000 else value
+
+
+def java_bytes_hash(data, start=0, end=None, current=1):
+    """WritableComparator.hashBytes / KeyFieldBasedPartitioner.hashCode"""
+    if end is None:
+        end = len(data)
+    for i in range(start, end):
+        byte = data[i]
+        # Java bytes are signed
+        current = (31 * current + (byte - 256 if byte > 127 else byte)) & INT_MASK
+    return to_int32(current)
+
+
+def java_string_hash(data):
+    """String.hashCode() of UTF-8 encoded bytes"""
+    current = 0
+    text = data.decode('utf-8', errors='replace').encode('utf-16-be')
+    for i in range(0, len(text), 2):
+        current = (31 * current + (text[i] << 8 | text[i + 1])) & INT_MASK
+    return to_int32(current)
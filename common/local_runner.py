@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Local runner for Hadoop Streaming jobs.
+
+Runs any mapper.py/reducer.py pair of the labs the way hadoop-streaming does,
+but on a single workstation and at full core count:
+
+* the input files are cut into line-aligned splits,
+* N mapper processes run in parallel, one per split,
+* map output is hash-partitioned to R reducers (Hadoop's HashPartitioner or
+  KeyFieldBasedPartitioner, so keys land on the same reducer as on a cluster),
+* an optional -combiner runs over each map task's sorted partition output,
+* each reducer gets its partition sorted by key and writes part-NNNNN.
+
+The options mirror the hadoop-streaming jar so the README commands carry over.
+Run it from the job directory, e.g. lab1/word_count:
+
+    python3 ../../common/local_runner.py \\
+        -input 1342-0.txt -output wordcount-output \\
+        -mapper "python3 mapper.py" -reducer "python3 reducer.py" \\
+        -numMapTasks 8 -numReduceTasks 4
+
+Supported -D properties:
+    mapreduce.job.maps, mapreduce.job.reduces
+    stream.map.output.field.separator, stream.num.map.output.key.fields
+    mapreduce.map.output.key.field.separator
+    mapreduce.partition.keypartitioner.options   (e.g. -k1,2)
+    mapreduce.job.output.key.comparator.class    (KeyFieldBasedComparator)
+    mapreduce.partition.keycomparator.options    (e.g. "-k1,1 -k2,2nr")
+    mapreduce.task.io.sort.mb, mapreduce.task.io.sort.factor
+Each reducer's input is sorted with common/external_sort.py, so partitions
+larger than memory spill to disk instead of failing.
+gzip, bzip2 and xz input is decompressed for the mappers (common/hadoop_input.py);
+a compressed file is one split unless it was rewritten with
+`hadoop_input.py reblock`, which makes it splittable at gzip members.
+Every -D property and -cmdenv variable is exported to the tasks with dots
+replaced by underscores, as Hadoop Streaming does.
+"""
+
+import argparse
+import os
+import re
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from external_sort import ExternalSorter, KeyFieldComparator
+from hadoop_input import file_codec, read_index, read_range
+from java_hash import java_bytes_hash, java_string_hash
+
+KEY_FIELD_PARTITIONER = 'org.apache.hadoop.mapred.lib.KeyFieldBasedPartitioner'
+KEY_FIELD_COMPARATOR = 'org.apache.hadoop.mapred.lib.KeyFieldBasedComparator'
+READ_CHUNK = 1 << 20
+
+
+def parse_field_ranges(options):
+    """Parse KeyFieldBasedPartitioner options such as '-k1,2 -k4,4'"""
+    ranges = []
+    for start, end in re.findall(r'-k\s*(\d+)(?:\.\d+)?(?:,(\d+)(?:\.\d+)?)?', options):
+        start = int(start)
+        ranges.append((start, int(end) if end else 0))  # 0 means "to end of key"
+    return ranges
+
+
+class JobConf:
+    """
+    Job configuration shared by the driver and the task processes.
+    """
+
+    def __init__(self, args):
+        props = dict(self.parse_property(p) for p in args.define)
+        self.properties = props
+        self.mapper = args.mapper
+        self.reducer = args.reducer
+        self.combiner = args.combiner
+        self.inputs = args.input
+        self.output = args.output
+        self.work_dir = os.path.abspath(args.chdir)
+        self.num_map_tasks = int(props.get('mapreduce.job.maps', args.numMapTasks or os.cpu_count() or 1))
+        self.num_reduce_tasks = int(props.get('mapreduce.job.reduces', args.numReduceTasks))
+        self.field_separator = self.unescape(props.get('stream.map.output.field.separator', '\t'))
+        self.num_key_fields = int(props.get('stream.num.map.output.key.fields', 1))
+        self.key_field_separator = self.unescape(props.get('mapreduce.map.output.key.field.separator', '\t'))
+        self.partitioner = args.partitioner
+        self.partition_ranges = parse_field_ranges(props.get('mapreduce.partition.keypartitioner.options', ''))
+        comparator_class = props.get('mapreduce.job.output.key.comparator.class', '')
+        self.comparator_options = (props.get('mapreduce.partition.keycomparator.options', '')
+                                   if comparator_class == KEY_FIELD_COMPARATOR else '')
+        self.sort_mb = float(props.get('mapreduce.task.io.sort.mb', 100))
+        self.sort_factor = int(props.get('mapreduce.task.io.sort.factor', 10))
+
+        self.env = dict(os.environ)
+        for name, value in props.items():
+            self.env[name.replace('.', '_')] = value
+        for item in args.cmdenv:
+            name, _, value = item.partition('=')
+            self.env[name] = value
+
+    @staticmethod
+    def parse_property(text):
+        name, sep, value = text.partition('=')
+        if not sep:
+            raise SystemExit(f"Invalid -D property (expected name=value): {text}")
+        return name.strip(), value
+
+    @staticmethod
+    def unescape(text):
+        return text.encode('utf-8').decode('unicode_escape').encode('utf-8')
+
+    def map_output_key(self, line):
+        """Split the key off a map output line (stream.num.map.output.key.fields)"""
+        sep = self.field_separator
+        pos = -len(sep)
+        for _ in range(self.num_key_fields):
+            pos = line.find(sep, pos + len(sep))
+            if pos < 0:
+                return line.rstrip(b'\r\n')
+        return line[:pos]
+
+    def partition(self, key):
+        """Reducer number for a map output key, as computed by Hadoop"""
+        if self.partitioner == KEY_FIELD_PARTITIONER:
+            return self.key_field_partition(key)
+        return (java_bytes_hash(key) & 0x7FFFFFFF) % self.num_reduce_tasks
+
+    def key_field_partition(self, key):
+        if not self.partition_ranges:
+            return (java_string_hash(key) & 0x7FFFFFFF) % self.num_reduce_tasks
+        if not key:
+            return 0
+        sep = self.key_field_separator
+        # Byte offsets of every field of the key
+        bounds = []
+        pos = 0
+        while True:
+            nxt = key.find(sep, pos)
+            if nxt < 0:
+                bounds.append((pos, len(key)))
+                break
+            bounds.append((pos, nxt))
+            pos = nxt + len(sep)
+
+        current = 0
+        for start_field, end_field in self.partition_ranges:
+            if start_field > len(bounds):
+                continue
+            if end_field == 0 or end_field > len(bounds):
+                end_field = len(bounds)
+            current = java_bytes_hash(key, bounds[start_field - 1][0], bounds[end_field - 1][1], current)
+        return (current & 0x7FFFFFFF) % self.num_reduce_tasks
+
+
+def list_input_files(paths):
+    """Expand input paths; like Hadoop, hidden and _-prefixed files are skipped"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                full = os.path.join(path, name)
+                if not name.startswith(('.', '_')) and os.path.isfile(full):
+                    files.append(full)
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            raise SystemExit(f"Input path does not exist: {path}")
+    return files
+
+
+def compute_splits(files, num_splits):
+    """Cut the input into roughly num_splits line-aligned (path, start, length) ranges"""
+    total = sum(os.path.getsize(f) for f in files)
+    goal = max(1, -(-total // max(1, num_splits)))
+
+    splits = []
+    for path in files:
+        size = os.path.getsize(path)
+        if size == 0:
+            continue
+        codec = file_codec(path)
+        if codec:
+            # Compressed: split only at the members of a reblocked gzip file
+            offsets = (read_index(path) if codec == 'gzip' else None) or [0]
+            boundaries = [0]
+            for offset in offsets[1:]:
+                if offset - boundaries[-1] >= goal:
+                    boundaries.append(offset)
+            boundaries.append(size)
+            for start, end in zip(boundaries, boundaries[1:]):
+                splits.append((path, start, end - start))
+            continue
+        boundaries = [0]
+        with open(path, 'rb') as f:
+            cut = goal
+            while cut < size:
+                f.seek(cut)
+                f.readline()  # move to the start of the next line
+                boundary = f.tell()
+                if boundary >= size:
+                    break
+                if boundary > boundaries[-1]:
+                    boundaries.append(boundary)
+                cut = boundary + goal
+        boundaries.append(size)
+        for start, end in zip(boundaries, boundaries[1:]):
+            splits.append((path, start, end - start))
+    return splits
+
+
+def feed_split(pipe, path, start, length):
+    """Copy one input split into the mapper's stdin, decompressed"""
+    try:
+        for chunk in read_range(path, start, length, READ_CHUNK):
+            pipe.write(chunk)
+    except BrokenPipeError:
+        pass  # the mapper stopped reading early
+    finally:
+        try:
+            pipe.close()
+        except BrokenPipeError:
+            pass
+
+
+def run_map_task(conf, task_id, split, spill_dir):
+    """Run one mapper over one split and partition its output"""
+    path, start, length = split
+    env = dict(conf.env)
+    env.update({
+        'mapreduce_map_input_file': os.path.abspath(path),
+        'map_input_file': os.path.abspath(path),
+        'mapreduce_map_input_start': str(start),
+        'mapreduce_map_input_length': str(length),
+        'mapreduce_task_partition': str(task_id),
+        'mapreduce_task_ismap': 'true',
+    })
+
+    if conf.num_reduce_tasks == 0:
+        # Map-only job: mapper output is the job output
+        outputs = [open(os.path.join(conf.output, f'part-{task_id:05d}'), 'wb')]
+    else:
+        outputs = [open(os.path.join(spill_dir, f'map-{task_id:05d}.part-{r:05d}'), 'wb')
+                   for r in range(conf.num_reduce_tasks)]
+
+    proc = subprocess.Popen(shlex.split(conf.mapper), stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, cwd=conf.work_dir, env=env)
+    feeder = threading.Thread(target=feed_split, args=(proc.stdin, path, start, length))
+    feeder.start()
+    try:
+        single = len(outputs) == 1
+        for line in proc.stdout:
+            if not line.endswith(b'\n'):
+                line += b'\n'
+            if single:
+                outputs[0].write(line)
+            else:
+                outputs[conf.partition(conf.map_output_key(line))].write(line)
+    finally:
+        feeder.join()
+        for out in outputs:
+            out.close()
+    if proc.wait() != 0:
+        raise RuntimeError(f"Map task {task_id} ({path} @ {start}) failed with exit code {proc.returncode}")
+
+    if conf.combiner and conf.num_reduce_tasks:
+        for out in outputs:
+            run_combiner(conf, out.name, spill_dir, env)
+    return task_id
+
+
+def run_combiner(conf, path, spill_dir, env):
+    """Sort one map output partition and replace it with the combiner's output"""
+    combined = path + '.combined'
+    with partition_sorter(conf, spill_dir) as sorter, open(combined, 'wb') as out:
+        with open(path, 'rb') as f:
+            sorter.extend(f)
+        proc = subprocess.Popen(shlex.split(conf.combiner), stdin=subprocess.PIPE,
+                                stdout=out, cwd=conf.work_dir, env=env)
+        try:
+            proc.stdin.writelines(sorter.sorted_lines())
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        if proc.wait() != 0:
+            raise RuntimeError(f"Combiner for {os.path.basename(path)} failed with exit code {proc.returncode}")
+    os.replace(combined, path)
+
+
+def partition_sorter(conf, spill_dir):
+    """External sorter configured like the job's shuffle sort"""
+    comparator = KeyFieldComparator(conf.comparator_options, conf.num_key_fields,
+                                    conf.field_separator, conf.key_field_separator)
+    return ExternalSorter(comparator.sort_key_function(), conf.sort_mb, conf.sort_factor, spill_dir)
+
+
+def run_reduce_task(conf, partition, spill_dir, num_map_tasks):
+    """Sort one partition and pipe it through the reducer into part-NNNNN"""
+    env = dict(conf.env)
+    env.update({
+        'mapreduce_task_partition': str(partition),
+        'mapreduce_task_ismap': 'false',
+    })
+    paths = [os.path.join(spill_dir, f'map-{m:05d}.part-{partition:05d}') for m in range(num_map_tasks)]
+
+    with partition_sorter(conf, spill_dir) as sorter, \
+            open(os.path.join(conf.output, f'part-{partition:05d}'), 'wb') as out:
+        for path in paths:
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    sorter.extend(f)
+                os.remove(path)
+
+        proc = subprocess.Popen(shlex.split(conf.reducer), stdin=subprocess.PIPE,
+                                stdout=out, cwd=conf.work_dir, env=env)
+        try:
+            proc.stdin.writelines(sorter.sorted_lines())
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        if proc.wait() != 0:
+            raise RuntimeError(f"Reduce task {partition} failed with exit code {proc.returncode}")
+    return partition
+
+
+def run_job(conf):
+    """Run the whole job; returns the list of part files written"""
+    if os.path.exists(conf.output):
+        raise SystemExit(f"Output directory {conf.output} already exists")
+    if conf.num_reduce_tasks and not conf.reducer:
+        raise SystemExit("-reducer is required unless -numReduceTasks is 0")
+
+    splits = compute_splits(list_input_files(conf.inputs), conf.num_map_tasks)
+    os.makedirs(conf.output)
+    workers = max(1, min(os.cpu_count() or 1, max(len(splits), conf.num_reduce_tasks)))
+
+    with tempfile.TemporaryDirectory(prefix='local-runner-') as spill_dir:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            maps = [pool.submit(run_map_task, conf, i, split, spill_dir) for i, split in enumerate(splits)]
+            for future in maps:
+                future.result()
+            print(f"Map phase complete: {len(splits)} tasks", file=sys.stderr)
+
+            reduces = [pool.submit(run_reduce_task, conf, r, spill_dir, len(splits))
+                       for r in range(conf.num_reduce_tasks)]
+            for future in reduces:
+                future.result()
+            if reduces:
+                print(f"Reduce phase complete: {len(reduces)} tasks", file=sys.stderr)
+
+    open(os.path.join(conf.output, '_SUCCESS'), 'w').close()
+    return sorted(os.path.join(conf.output, name) for name in os.listdir(conf.output) if name.startswith('part-'))
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Run a Hadoop Streaming job locally in parallel")
+    parser.add_argument('-input', action='append', required=True, help="Input file or directory (repeatable)")
+    parser.add_argument('-output', required=True, help="Output directory (must not exist)")
+    parser.add_argument('-mapper', required=True, help='Mapper command, e.g. "python3 mapper.py"')
+    parser.add_argument('-reducer', help='Reducer command, e.g. "python3 reducer.py"')
+    parser.add_argument('-combiner', help='Combiner command, run on every map task\'s sorted output per partition')
+    parser.add_argument('-numMapTasks', type=int, help="Number of input splits (default: CPU count)")
+    parser.add_argument('-numReduceTasks', type=int, default=1, help="Number of reducers; 0 for a map-only job")
+    parser.add_argument('-partitioner', help=f"Only {KEY_FIELD_PARTITIONER} is recognised")
+    parser.add_argument('-D', dest='define', action='append', default=[], metavar='NAME=VALUE',
+                        help="Job property, as for hadoop-streaming")
+    parser.add_argument('-cmdenv', action='append', default=[], metavar='NAME=VALUE',
+                        help="Environment variable for the tasks")
+    parser.add_argument('-files', help="Accepted for compatibility; tasks run in -chdir where the files already are")
+    parser.add_argument('-chdir', default='.', help="Working directory of the tasks (default: current directory)")
+    return parser
+
+
+def main():
+    """Main runner execution"""
+    conf = JobConf(build_arg_parser().parse_args())
+    try:
+        parts = run_job(conf)
+    except RuntimeError as e:
+        print(f"Job failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Job complete. Output written to {len(parts)} part files in {conf.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Hour/day buckets of ISO 8601 timestamps for the lab mappers.
+
+The time keys the mappers emit (hour of day, weekday, 'YYYY-MM-DD',
+'YYYY-MM-DD-HH', ...) depend only on the date and hour of a record, so
+parsing every timestamp with datetime.fromisoformat() and strftime() repeats
+the same work for all records of an hour. hour_bucket() instead
+
+* checks well-formed timestamps (YYYY-MM-DDTHH:MM[:SS[.fff[fff]]][+HH:MM])
+  with one precompiled regex and slices off the date/hour prefix,
+* looks the prefix up in a bounded LRU cache of HourBucket tuples,
+* falls back to datetime.fromisoformat() for every other spelling,
+
+and raises ValueError exactly where fromisoformat() would, so callers keep
+their error handling:
+
+    from timestamp_buckets import hour_bucket
+    bucket = hour_bucket('2024-03-05T14:27:00')
+    bucket.hour_key, bucket.day_key, bucket.weekday   # '2024-03-05-14', '2024-03-05', 1
+"""
+
+import re
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+
+CACHE_SIZE = 1 << 16   # hour buckets kept (~7.5 years of hours)
+
+HourBucket = namedtuple('HourBucket', 'year month day hour weekday day_key hour_key')
+
+# Date and hour are validated by the datetime() call of the cached lookup
+ISO_TIMESTAMP = re.compile(
+    r'([0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}):[0-5][0-9]'
+    r'(?::[0-5][0-9](?:\.[0-9]{3}(?:[0-9]{3})?)?)?'
+    r'(?:[+-](?:[01][0-9]|2[0-3]):[0-5][0-9])?')
+
+
+def bucket_of(dt):
+    """HourBucket of a datetime"""
+    return HourBucket(dt.year, dt.month, dt.day, dt.hour, dt.weekday(),
+                      dt.strftime('%Y-%m-%d'), dt.strftime('%Y-%m-%d-%H'))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def prefix_bucket(prefix):
+    """HourBucket of a 'YYYY-MM-DDTHH' prefix (ValueError for invalid dates)"""
+    return bucket_of(datetime(int(prefix[0:4]), int(prefix[5:7]), int(prefix[8:10]), int(prefix[11:13])))
+
+
+def hour_bucket(timestamp):
+    """HourBucket of an ISO 8601 timestamp; ValueError if fromisoformat() rejects it"""
+    match = ISO_TIMESTAMP.fullmatch(timestamp)
+    if match:
+        return prefix_bucket(match.group(1))
+    return bucket_of(datetime.fromisoformat(timestamp))
+
+
+def cache_info():
+    """Hits and misses of the hour cache"""
+    return prefix_bucket.cache_info()
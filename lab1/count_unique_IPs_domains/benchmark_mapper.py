@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark of mapper.py (latin-1 text mode) against mapper.py --binary.
+
+Runs both modes on the same log, checks that their output is byte-identical
+and reports the best wall time of a few runs. Without a log file a
+NASA-style log is generated, including a few awkward lines (latin-1 bytes,
+CR line ends, blank and indented lines).
+
+    python3 benchmark_mapper.py                          # 1M generated lines
+    python3 benchmark_mapper.py --lines 5000000
+    python3 benchmark_mapper.py NASA_access_log_Jul95
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def generate_log(path, num_lines):
+    """NASA_access_log_Jul95-like lines plus some edge cases"""
+    random.seed(42)
+    hosts = [f"host{i}.{random.choice(['com', 'edu', 'net', 'gov'])}" for i in range(20000)]
+    hosts += [f"{random.randint(1, 223)}.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(0, 255)}"
+              for _ in range(10000)]
+    pages = [b'/history/apollo/', b'/shuttle/countdown/', b'/images/NASA-logosmall.gif', b'/ksc.html']
+    odd = [b'\n', b'   \n', b'  indented.host - - [01/Jul/1995:00:00:01 -0400] "GET / HTTP/1.0" 200 1\n',
+           b'caf\xe9.host - - [01/Jul/1995:00:00:01 -0400] "GET / HTTP/1.0" 200 1\n',
+           b'cr.host - - [01/Jul/1995:00:00:01 -0400] "GET / HTTP/1.0" 200 1\r\n',
+           b'lonecr.host\rsecond.host - -\n', b'\xa0nbsp.host - -\x85\n']
+    with open(path, 'wb') as f:
+        buf = []
+        for i in range(num_lines):
+            if i % 100000 == 0:
+                buf.extend(odd)
+            host = random.choice(hosts).encode('ascii')
+            buf.append(b'%s - - [01/Jul/1995:%02d:%02d:%02d -0400] "GET %s HTTP/1.0" 200 %d\n'
+                       % (host, i // 3600 % 24, i // 60 % 60, i % 60, random.choice(pages), random.randint(100, 9999)))
+            if len(buf) >= 100000:
+                f.write(b''.join(buf))
+                buf = []
+        f.write(b''.join(buf))
+
+
+def time_mapper(log_path, args, repeats):
+    """Best wall time and output digest of one mapper mode"""
+    best = None
+    digest = None
+    for _ in range(repeats):
+        with open(log_path, 'rb') as stdin:
+            start = time.perf_counter()
+            result = subprocess.run([sys.executable, os.path.join(HERE, 'mapper.py')] + args,
+                                    stdin=stdin, stdout=subprocess.PIPE, check=True)
+            elapsed = time.perf_counter() - start
+        digest = hashlib.sha256(result.stdout).hexdigest()
+        best = elapsed if best is None else min(best, elapsed)
+    return best, digest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark mapper.py text mode vs --binary")
+    parser.add_argument('log', nargs='?', help="Access log to use (default: generate one)")
+    parser.add_argument('--lines', type=int, default=1000000, help="Lines to generate (default: 1000000)")
+    parser.add_argument('--repeats', type=int, default=3, help="Runs per mode (default: 3)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = args.log
+        if not log_path:
+            log_path = os.path.join(tmp, 'access.log')
+            generate_log(log_path, args.lines)
+        size_mb = os.path.getsize(log_path) / 1e6
+
+        text_time, text_digest = time_mapper(log_path, [], args.repeats)
+        binary_time, binary_digest = time_mapper(log_path, ['--binary'], args.repeats)
+
+    print(f"input: {size_mb:.1f} MB")
+    print(f"text mode:   {text_time:.2f} s  ({size_mb / text_time:.1f} MB/s)")
+    print(f"binary mode: {binary_time:.2f} s  ({size_mb / binary_time:.1f} MB/s)")
+    print(f"speedup:     {text_time / binary_time:.1f}x")
+    print(f"output identical: {text_digest == binary_digest}")
+    if text_digest != binary_digest:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
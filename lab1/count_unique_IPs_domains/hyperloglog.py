@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+HyperLogLog cardinality sketch (Flajolet et al. 2007, with the paper's
+small-range correction: linear counting below 2.5m). The 64-bit hash makes
+the large-range correction unnecessary.
+
+A sketch with precision p has m = 2**p one-byte registers and estimates the
+number of distinct items with a relative standard error of about 1.04/sqrt(m):
+
+    p = 10:  1 KiB  ~3.25%
+    p = 12:  4 KiB  ~1.63%
+    p = 14: 16 KiB  ~0.81%   (default)
+    p = 16: 64 KiB  ~0.41%
+
+Sketches of the same precision merge by taking the register-wise maximum,
+so every mapper can build its own and a reducer combines them.
+"""
+
+import base64
+import binascii
+import hashlib
+import math
+import zlib
+
+MIN_PRECISION = 4
+MAX_PRECISION = 18
+
+
+class HyperLogLog:
+    """
+    HyperLogLog sketch over byte strings (str items are UTF-8 encoded).
+    """
+
+    def __init__(self, precision=14, registers=None):
+        if not MIN_PRECISION <= precision <= MAX_PRECISION:
+            raise ValueError(f"precision must be between {MIN_PRECISION} and {MAX_PRECISION}")
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = registers if registers is not None else bytearray(self.m)
+        self.rank_bits = 64 - precision
+
+    def add(self, item):
+        if isinstance(item, str):
+            item = item.encode('utf-8')
+        h = int.from_bytes(hashlib.blake2b(item, digest_size=8).digest(), 'big')
+        index = h >> self.rank_bits
+        rest = h & ((1 << self.rank_bits) - 1)
+        # Position of the leftmost 1-bit in the remaining bits
+        rank = self.rank_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("cannot merge sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def alpha(self):
+        if self.m == 16:
+            return 0.673
+        if self.m == 32:
+            return 0.697
+        if self.m == 64:
+            return 0.709
+        return 0.7213 / (1 + 1.079 / self.m)
+
+    def estimate(self):
+        """Estimated number of distinct items"""
+        m = self.m
+        raw = self.alpha() * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            # Small range: linear counting is more accurate
+            return m * math.log(m / zeros)
+        return raw
+
+    def relative_error(self):
+        """Relative standard error of the estimate"""
+        return 1.04 / math.sqrt(self.m)
+
+    def serialize(self):
+        """Compact text form: precision:base64(zlib(registers))"""
+        packed = base64.b64encode(zlib.compress(bytes(self.registers))).decode('ascii')
+        return f"{self.precision}:{packed}"
+
+    @classmethod
+    def deserialize(cls, text):
+        precision, _, packed = text.partition(':')
+        try:
+            registers = bytearray(zlib.decompress(base64.b64decode(packed, validate=True)))
+        except (binascii.Error, zlib.error) as e:
+            raise ValueError(f"corrupt sketch: {e}") from e
+        sketch = cls(int(precision), registers)
+        if len(registers) != sketch.m:
+            raise ValueError("register count does not match precision")
+        return sketch
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Local aggregation of mapper.py --packed output without a dict of strings.
+
+IPv4 keys (i<8 hex digits>) are counted in radix buckets: the high 16 bits
+of the address select one of 65536 buckets, each holding two parallel
+sorted arrays, the low 16 bits (array('H'), 2 bytes) and the counts
+(array('Q'), 8 bytes). Incoming addresses are first appended to a pending
+array('Q') of address << 32 | count and folded into the buckets in sorted
+batches, so a distinct address costs ~10 bytes instead of the ~150 bytes of
+a dict entry with a str key and an int value. Hostname keys (h<name>) are
+rarer and go through an ordinary dict.
+
+Input order does not matter. Output is the same as `sort | reducer.py
+--packed`: hostnames in byte order, then IPv4 addresses in numeric order.
+
+    cat NASA_access_log_Jul95 | python3 mapper.py --packed | python3 ip_aggregator.py
+    python3 ip_aggregator.py --stats packed-part-* > ip_counts.tsv
+"""
+
+import argparse
+import sys
+from array import array
+from itertools import groupby
+
+COUNT_BITS = 32
+COUNT_MASK = (1 << COUNT_BITS) - 1
+
+
+class RadixCounter:
+    """
+    Counts 32-bit integer keys in 65536 buckets of sorted (low 16 bits, count) arrays.
+    """
+
+    def __init__(self, batch_size=1 << 20):
+        self.lows = [None] * 65536      # bucket -> array('H') of sorted low halves
+        self.counts = [None] * 65536    # bucket -> array('Q') of counts
+        self.pending = array('Q')
+        self.batch_size = batch_size
+        self.distinct = 0
+
+    def add(self, key, count=1):
+        while count > COUNT_MASK:
+            self.pending.append(key << COUNT_BITS | COUNT_MASK)
+            count -= COUNT_MASK
+        self.pending.append(key << COUNT_BITS | count)
+        if len(self.pending) >= self.batch_size:
+            self.fold()
+
+    def fold(self):
+        """Merge the pending batch into the buckets"""
+        if not self.pending:
+            return
+        batch = sorted(self.pending)
+        self.pending = array('Q')
+
+        def bucket_of(entry):
+            return entry >> (COUNT_BITS + 16)
+
+        for bucket, entries in groupby(batch, key=bucket_of):
+            new_lows = array('H')
+            new_counts = array('Q')
+            for entry in entries:
+                low = entry >> COUNT_BITS & 0xffff
+                if new_lows and new_lows[-1] == low:
+                    new_counts[-1] += entry & COUNT_MASK
+                else:
+                    new_lows.append(low)
+                    new_counts.append(entry & COUNT_MASK)
+            old_lows = self.lows[bucket]
+            if old_lows is None:
+                self.lows[bucket], self.counts[bucket] = new_lows, new_counts
+                self.distinct += len(new_lows)
+            else:
+                self.merge_bucket(bucket, new_lows, new_counts)
+
+    def merge_bucket(self, bucket, new_lows, new_counts):
+        """Two-way merge of a sorted batch into a bucket's sorted arrays"""
+        old_lows, old_counts = self.lows[bucket], self.counts[bucket]
+        lows, counts = array('H'), array('Q')
+        i = j = 0
+        while i < len(old_lows) and j < len(new_lows):
+            if old_lows[i] < new_lows[j]:
+                lows.append(old_lows[i])
+                counts.append(old_counts[i])
+                i += 1
+            elif old_lows[i] > new_lows[j]:
+                lows.append(new_lows[j])
+                counts.append(new_counts[j])
+                j += 1
+            else:
+                lows.append(old_lows[i])
+                counts.append(old_counts[i] + new_counts[j])
+                i += 1
+                j += 1
+        lows.extend(old_lows[i:])
+        counts.extend(old_counts[i:])
+        lows.extend(new_lows[j:])
+        counts.extend(new_counts[j:])
+        self.distinct += len(lows) - len(old_lows)
+        self.lows[bucket], self.counts[bucket] = lows, counts
+
+    def items(self):
+        """(key, count) in ascending key order"""
+        self.fold()
+        for bucket in range(65536):
+            lows = self.lows[bucket]
+            if lows is None:
+                continue
+            high = bucket << 16
+            yield from zip((high | low for low in lows), self.counts[bucket])
+
+    def nbytes(self):
+        """Bytes held by the bucket arrays (excluding the pending batch)"""
+        return sum(a.buffer_info()[1] * a.itemsize
+                   for arrays in (self.lows, self.counts) for a in arrays if a is not None)
+
+
+def aggregate(stream, ips, hosts):
+    """Adds mapper.py --packed records (key<TAB>count, bytes) to the counters"""
+    for line_num, line in enumerate(stream):
+        key, _, count = line.rstrip(b'\r\n').partition(b'\t')
+        try:
+            if key[:1] == b'i' and len(key) == 9:
+                ips.add(int(key[1:], 16), int(count))
+            elif key[:1] == b'h':
+                name = key[1:]
+                hosts[name] = hosts.get(name, 0) + int(count)
+            elif key:
+                raise ValueError(f"not a packed client key: {key!r}")
+        except ValueError as e:
+            print(f"AGGREGATOR ERROR: line {line_num+1}: {e}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count mapper.py --packed records in radix buckets")
+    parser.add_argument('files', nargs='*', help="Packed mapper output (default: stdin)")
+    parser.add_argument('--batch-size', type=int, default=1 << 20,
+                        help="Pending records folded into the buckets at once (default: 1048576)")
+    parser.add_argument('--stats', action='store_true',
+                        help="Print distinct keys and bucket memory to stderr")
+    args = parser.parse_args()
+
+    ips = RadixCounter(args.batch_size)
+    hosts = {}
+    if args.files:
+        for path in args.files:
+            with open(path, 'rb') as f:
+                aggregate(f, ips, hosts)
+    else:
+        aggregate(sys.stdin.buffer, ips, hosts)
+
+    out = sys.stdout.buffer
+    encoding = sys.stdout.encoding or 'utf-8'
+    for name in sorted(hosts):
+        text = name
+        if not text.isascii():
+            # Same re-encoding as reducer.py, which reads latin-1 and prints
+            text = text.decode('latin-1').encode(encoding)
+        out.write(b'%s\t%d\n' % (text, hosts[name]))
+    for value, count in ips.items():
+        out.write(b'%d.%d.%d.%d\t%d\n' % (value >> 24, value >> 16 & 255, value >> 8 & 255, value & 255, count))
+    out.flush()
+
+    if args.stats:
+        print(f"distinct IPv4 addresses: {ips.distinct} in {ips.nbytes()} bytes of arrays", file=sys.stderr)
+        print(f"distinct hostnames: {len(hosts)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,22 @@
 #!/usr/bin/env python3
 import sys
+import os
 import io # Required for TextIOWrapper
+import argparse
+
+# hadoop_input.py comes from ../../common locally and from -files on the cluster
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.extend([HERE, os.path.join(HERE, '..', '..', 'common')])
+from hadoop_input import open_stdin
+
+# Bytes that str.strip() removes from a latin-1 decoded line
+LATIN1_WHITESPACE = bytes(c for c in range(256) if chr(c).isspace())
+BLOCK_SIZE = 1 << 20
+
+def is_ipv4(address):
+    """True for dotted-quad IPv4 addresses, False for hostnames"""
+    parts = address.split('.')
+    return len(parts) == 4 and all(p.isdigit() and len(p) <= 3 and int(p) <= 255 for p in parts)
 
 def run_mapper():
     for line_num, raw_line in enumerate(sys.stdin): # sys.stdin is now the reconfigured wrapper
@@ -28,13 +44,152 @@ def run_mapper():
             print(f"MAPPER ERROR: Failed processing line {line_num+1}: '{raw_line.strip()}'", file=sys.stderr)
             print(f"MAPPER EXCEPTION: {e}", file=sys.stderr)
 
+def client_fields(lines, encoding):
+    """First field of every non-blank line, encoded the way print() would write it"""
+    ws = LATIN1_WHITESPACE
+    for line in lines:
+        line = line.strip(ws)
+        if not line:
+            continue
+        end = line.find(b' ')
+        client = line[:end] if end >= 0 else line
+        if not client.isascii():
+            # print() writes the latin-1 decoded text in the stdout encoding
+            client = client.decode('latin-1').encode(encoding)
+        yield client
+
+def line_blocks():
+    """
+    Lines of stdin as bytes, one list per 1 MB block. Line ends follow
+    text mode: \n, \r\n and a lone \r all end a line.
+    """
+    read = sys.stdin.buffer.read
+    pending = b''
+
+    while True:
+        block = read(BLOCK_SIZE)
+        if not block:
+            break
+        data = pending + block
+        held = b''
+        if data.endswith(b'\r'):
+            # Might be the first half of \r\n; decide with the next block
+            data, held = data[:-1], b'\r'
+        if b'\r' in data:
+            data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        cut = data.rfind(b'\n')
+        if cut < 0:
+            pending = data + held
+            continue
+        pending = data[cut + 1:] + held
+        yield data[:cut].split(b'\n')
+
+    if pending:
+        pending = pending.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        yield pending.split(b'\n')
+
+def run_binary_mapper():
+    """
+    Fast path: same output as run_mapper(), byte for byte, without decoding
+    every line. Reads stdin in large blocks, finds the first field with bytes
+    operations and writes each block's output with one buffered write.
+    """
+    write = sys.stdout.buffer.write
+    encoding = sys.stdout.encoding or 'utf-8'
+
+    for lines in line_blocks():
+        clients = list(client_fields(lines, encoding))
+        if clients:
+            write(b'\t1\n'.join(clients) + b'\t1\n')
+    sys.stdout.buffer.flush()
+
+def pack_client(client):
+    """
+    Fixed-width key for a client (bytes): i + 8 hex digits for a canonical
+    dotted-quad IPv4 address, h + name for anything else. Addresses with
+    leading zeros stay hostnames so that unpacking gives back the same text.
+    """
+    parts = client.split(b'.')
+    if len(parts) == 4:
+        value = 0
+        for part in parts:
+            if not part.isdigit() or len(part) > 3 or (part[0] == 48 and len(part) > 1):
+                return b'h' + client
+            octet = int(part)
+            if octet > 255:
+                return b'h' + client
+            value = value << 8 | octet
+        return b'i%08x' % value
+    return b'h' + client
+
+def run_packed_mapper():
+    """
+    Packed mode: like --binary, but emits pack_client() keys. IPv4 keys are
+    9 bytes whatever the address length, and sort in numeric address order.
+    """
+    write = sys.stdout.buffer.write
+    encoding = sys.stdout.encoding or 'utf-8'
+
+    for lines in line_blocks():
+        keys = [pack_client(client) for client in client_fields(lines, encoding)]
+        if keys:
+            write(b'\t1\n'.join(keys) + b'\t1\n')
+    sys.stdout.buffer.flush()
+
+def run_cardinality_mapper(precision):
+    """
+    Cardinality mode: instead of one record per request, build HyperLogLog
+    sketches of the distinct IPs and hostnames of this split and emit them
+    as two records (distinct_ips / distinct_hosts <TAB> serialized sketch).
+    """
+    from hyperloglog import HyperLogLog
+
+    sketches = {'distinct_ips': HyperLogLog(precision), 'distinct_hosts': HyperLogLog(precision)}
+    ips, hosts = sketches['distinct_ips'], sketches['distinct_hosts']
+
+    for line_num, raw_line in enumerate(sys.stdin):
+        try:
+            line = raw_line.strip()
+            if not line:
+                continue
+            client = line.split(' ', 1)[0]
+            if not client:
+                continue
+            # latin-1 round-trips every byte, so the sketch sees the raw bytes
+            (ips if is_ipv4(client) else hosts).add(client.encode('latin-1'))
+        except Exception as e:
+            print(f"MAPPER ERROR: Failed processing line {line_num+1}: '{raw_line.strip()}'", file=sys.stderr)
+            print(f"MAPPER EXCEPTION: {e}", file=sys.stderr)
+
+    for name, sketch in sketches.items():
+        print(f'{name}\t{sketch.serialize()}')
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count requests per client IP/host")
+    parser.add_argument('--binary', action='store_true',
+                        help="Bytes-level fast path with identical output")
+    parser.add_argument('--packed', action='store_true',
+                        help="Emit fixed-width keys: i<8 hex digits> for IPv4, h<name> for hostnames")
+    parser.add_argument('--cardinality', action='store_true',
+                        help="Emit HyperLogLog sketches of the distinct clients instead of ip<TAB>1")
+    parser.add_argument('--precision', type=int, default=14,
+                        help="HyperLogLog precision p, 2**p registers (default: 14, ~0.81%% error)")
+    args = parser.parse_args()
+
     # Reconfigure sys.stdin to read with 'latin-1' encoding.
     # This will treat all bytes as valid characters from the Latin-1 set.
-    sys.stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='latin-1')
+    # open_stdin() decompresses gzip/bz2/xz input, plain text passes through.
+    sys.stdin = io.TextIOWrapper(open_stdin(), encoding='latin-1')
     
     # Optional: If you want to be sure about output encoding for Hadoop,
     # though print() usually handles this well by defaulting to UTF-8 on Linux.
     # sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     
-    run_mapper()
+    if args.binary:
+        run_binary_mapper()
+    elif args.packed:
+        run_packed_mapper()
+    elif args.cardinality:
+        run_cardinality_mapper(args.precision)
+    else:
+        run_mapper()
@@ -1,9 +1,24 @@
 #!/usr/bin/env python3
 import sys
 import io # Required for TextIOWrapper
+import argparse
 
-def run_reducer():
+def unpack_client(key):
+    """Inverse of mapper.py pack_client(): i<8 hex digits> -> dotted quad, h<name> -> name"""
+    if key.startswith('i') and len(key) == 9:
+        value = int(key[1:], 16)
+        return f'{value >> 24}.{value >> 16 & 255}.{value >> 8 & 255}.{value & 255}'
+    if key.startswith('h'):
+        return key[1:]
+    raise ValueError(f"not a packed client key: {key!r}")
+
+def run_reducer(decode=None):
+    """
+    Sums the counts of each key. With decode (e.g. unpack_client) the
+    keys are converted back to client names on output.
+    """
     current_ip = None
+    current_name = None  # current_ip as printed; None while a key fails to decode
     current_count = 0
 
     for line_num, raw_line in enumerate(sys.stdin): # sys.stdin is now the reconfigured wrapper
@@ -18,12 +33,15 @@ def run_reducer():
             if current_ip == ip_address:
                 current_count += count
             else:
-                if current_ip:
+                if current_name:
                     # Output the previous IP's count
-                    print(f'{current_ip}\t{current_count}')
+                    print(f'{current_name}\t{current_count}')
                 
                 current_ip = ip_address
+                current_name = None
                 current_count = count
+                # Decoded once per key; a key that fails is skipped with all its lines
+                current_name = decode(ip_address) if decode else ip_address
         except ValueError:
             # This error is for when int(count_str) fails or line.split fails
             print(f"REDUCER ERROR: ValueError on line {line_num+1} (decoded): '{raw_line.strip()}'", file=sys.stderr)
@@ -34,14 +52,58 @@ def run_reducer():
             continue # Skip lines that cause other errors
 
     # Output the last IP address count
-    if current_ip:
-        print(f'{current_ip}\t{current_count}')
+    if current_name:
+        print(f'{current_name}\t{current_count}')
+
+def run_cardinality_reducer():
+    """
+    Merges the mappers' HyperLogLog sketches (mapper.py --cardinality) and
+    prints name<TAB>estimated distinct count<TAB>relative standard error for
+    distinct_ips, distinct_hosts and their union distinct_clients.
+    Run with a single reducer; input is a few records per mapper.
+    """
+    from hyperloglog import HyperLogLog
+
+    merged = {}
+    for line_num, raw_line in enumerate(sys.stdin):
+        try:
+            name, serialized = raw_line.strip().split('\t', 1)
+            sketch = HyperLogLog.deserialize(serialized)
+            if name in merged:
+                merged[name].merge(sketch)
+            else:
+                merged[name] = sketch
+        except ValueError as e:
+            print(f"REDUCER ERROR: Invalid sketch on line {line_num+1}: {e}", file=sys.stderr)
+            continue
+
+    if 'distinct_ips' in merged and 'distinct_hosts' in merged:
+        # IPs and hostnames are disjoint, so the union sketch counts all clients
+        clients = HyperLogLog.deserialize(merged['distinct_ips'].serialize())
+        clients.merge(merged['distinct_hosts'])
+        merged['distinct_clients'] = clients
+
+    for name in sorted(merged):
+        sketch = merged[name]
+        print(f'{name}\t{round(sketch.estimate())}\t{sketch.relative_error():.4f}')
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sum requests per client IP/host")
+    parser.add_argument('--packed', action='store_true',
+                        help="Input keys from mapper.py --packed; print them as IPs/hostnames again")
+    parser.add_argument('--cardinality', action='store_true',
+                        help="Merge HyperLogLog sketches from mapper.py --cardinality")
+    args = parser.parse_args()
+
     # Reconfigure sys.stdin for the reducer as well.
     sys.stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='latin-1')
     
     # Optional: Reconfigure sys.stdout for the reducer.
     # sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     
-    run_reducer()
+    if args.cardinality:
+        run_cardinality_reducer()
+    elif args.packed:
+        run_reducer(decode=unpack_client)
+    else:
+        run_reducer()
@@ -1,6 +1,64 @@
 #!/usr/bin/env python3
 import sys
+import os
+import argparse
 
-for line in sys.stdin:
-    for word in line.strip().split():
-        print(f"{word.lower()}\t1")
+# counting.py comes from ../../common locally and from -files on the cluster
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.extend([HERE, os.path.join(HERE, '..', '..', 'common')])
+from counting import InMapperCombiner
+
+
+def emit_topk_summary(capacity):
+    """
+    Top-K mode: one Space-Saving summary per mapper instead of all counts.
+    Emits word<TAB>count<TAB>error<TAB>floor for every monitored word, plus
+    a record with an empty key carrying this summary's floor, which the
+    reducer needs to bound words this mapper did not monitor.
+    """
+    from space_saving import SpaceSaving
+
+    summary = SpaceSaving(capacity)
+    for line in sys.stdin:
+        for word in line.strip().split():
+            summary.add(word.lower())
+
+    floor = summary.floor()
+    for word, count, error in summary.items():
+        print(f"{word}\t{count}\t{error}\t{floor}")
+    print(f"\t{floor}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Word count mapper")
+    parser.add_argument('--combine', action='store_true',
+                        help="In-mapper combining: emit partial counts instead of word<TAB>1")
+    parser.add_argument('--memory-mb', type=float, default=64,
+                        help="Memory budget of the combining table in MB (default: 64)")
+    parser.add_argument('--evict', choices=['oldest', 'heaviest'], default='oldest',
+                        help="Entries flushed when the budget is hit (default: oldest)")
+    parser.add_argument('--topk', type=int, metavar='K',
+                        help="Emit only a Space-Saving summary for the K heaviest words")
+    parser.add_argument('--capacity', type=int,
+                        help="Counters of the Space-Saving summary (default: 4 * K)")
+    args = parser.parse_args()
+
+    if args.topk:
+        emit_topk_summary(args.capacity or 4 * args.topk)
+        return
+
+    if not args.combine:
+        for line in sys.stdin:
+            for word in line.strip().split():
+                print(f"{word.lower()}\t1")
+        return
+
+    combiner = InMapperCombiner(args.memory_mb, args.evict)
+    for line in sys.stdin:
+        for word in line.strip().split():
+            combiner.add(word.lower())
+    combiner.flush()
+
+
+if __name__ == "__main__":
+    main()
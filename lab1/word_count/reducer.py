@@ -1,12 +1,110 @@
 #!/usr/bin/env python3
 import sys
-from collections import defaultdict
+import os
+import argparse
+import heapq
 
-word_counts = defaultdict(int)
+# counting.py comes from ../../common locally and from -files on the cluster
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.extend([HERE, os.path.join(HERE, '..', '..', 'common')])
+from counting import SpillingCounter
 
-for line in sys.stdin:
-    word, count = line.strip().split("\t")
-    word_counts[word] += int(count)
 
-for word, count in word_counts.items():
-    print(f"{word}\t{count}")
+def stream_reduce(lines):
+    """Sorted input, as Hadoop delivers it: one running total, O(1) state"""
+    current_word = None
+    current_count = 0
+
+    for line in lines:
+        word, count = line.strip().split("\t")
+        if word == current_word:
+            current_count += int(count)
+        else:
+            if current_word is not None:
+                print(f"{current_word}\t{current_count}")
+            current_word = word
+            current_count = int(count)
+
+    if current_word is not None:
+        print(f"{current_word}\t{current_count}")
+
+
+def hash_reduce(lines, memory_mb):
+    """Any input order, e.g. unsorted local pipes: hash table that spills to disk"""
+    word_counts = SpillingCounter(memory_mb)
+
+    for line in lines:
+        word, count = line.strip().split("\t")
+        word_counts.add(word, int(count))
+
+    for word, count in word_counts.items():
+        print(f"{word}\t{count}")
+
+
+def topk_reduce(lines, k):
+    """
+    Merges the mappers' Space-Saving summaries (mapper.py --topk) and prints
+    the K heaviest words as word<TAB>count<TAB>error, heaviest first, where
+    count - error <= true count <= count. Needs sorted input and a single
+    reducer; state is a heap of K entries.
+
+    For a word, count = sum of reported counts + floors of the summaries
+    that did not report it = (reported - their floors) + sum of all floors.
+    The last term is the same for every word, so words can be ranked before
+    the floor records have been seen.
+    """
+    heap = []           # (reported count - floors of reporting mappers, word, error part)
+    floor_total = 0
+
+    def offer(word, count, error, floors):
+        entry = (count - floors, word, error - floors)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    current_word = None
+    count = error = floors = 0
+    for line in lines:
+        fields = line.rstrip("\n").split("\t")
+        if fields[0] == "":
+            floor_total += int(fields[1])   # a mapper's floor record
+            continue
+        word = fields[0]
+        if word != current_word:
+            if current_word is not None:
+                offer(current_word, count, error, floors)
+            current_word = word
+            count = error = floors = 0
+        count += int(fields[1])
+        error += int(fields[2])
+        floors += int(fields[3])
+
+    if current_word is not None:
+        offer(current_word, count, error, floors)
+
+    for ranked, word, error_part in sorted(heap, reverse=True):
+        print(f"{word}\t{ranked + floor_total}\t{error_part + floor_total}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Word count reducer")
+    parser.add_argument('--mode', choices=['hash', 'stream'], default='hash',
+                        help="stream: input sorted by word (Hadoop), O(1) memory; "
+                             "hash: any order, table spills to disk (default)")
+    parser.add_argument('--memory-mb', type=float, default=64,
+                        help="Memory budget of the hash table in MB (default: 64)")
+    parser.add_argument('--topk', type=int, metavar='K',
+                        help="Merge Space-Saving summaries from mapper.py --topk and print the K heaviest words")
+    args = parser.parse_args()
+
+    if args.topk:
+        topk_reduce(sys.stdin, args.topk)
+    elif args.mode == 'stream':
+        stream_reduce(sys.stdin)
+    else:
+        hash_reduce(sys.stdin, args.memory_mb)
+
+
+if __name__ == "__main__":
+    main()
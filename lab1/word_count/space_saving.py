@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Space-Saving heavy-hitter summary (Metwally, Agrawal, El Abbadi 2005).
+
+Keeps at most `capacity` counters. A new item arriving when all counters are
+taken replaces the item with the smallest count and inherits that count as
+its error, so for every monitored item
+
+    count - error <= true frequency <= count
+
+and any item with true frequency > total / capacity is monitored.
+
+Summaries built by several mappers are merged in reducer.py: an item missing
+from a full summary may have occurred up to that summary's floor (its
+smallest count) times there, which is added to both its count and its error.
+"""
+
+import heapq
+
+
+class SpaceSaving:
+    """
+    Space-Saving summary over a stream of items.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counters = {}  # item -> [count, error]
+        self.heap = []      # (count, item); counts only grow, so entries may be stale (too low)
+        self.total = 0
+
+    def add(self, item, weight=1):
+        self.total += weight
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += weight
+            return
+
+        if len(self.counters) < self.capacity:
+            self.counters[item] = [weight, 0]
+            heapq.heappush(self.heap, (weight, item))
+            return
+
+        # Replace the item with the smallest count
+        floor = self.floor()
+        _, victim = self.heap[0]
+        del self.counters[victim]
+        self.counters[item] = [floor + weight, floor]
+        heapq.heapreplace(self.heap, (floor + weight, item))
+
+    def floor(self):
+        """Smallest monitored count (0 while the summary is not full)"""
+        if len(self.counters) < self.capacity:
+            return 0
+        heap = self.heap
+        while True:
+            count, item = heap[0]
+            current = self.counters[item][0]
+            if count == current:
+                return count
+            # Stale entry: refresh it and look again
+            heapq.heapreplace(heap, (current, item))
+
+    def items(self):
+        """(item, count, error) for every monitored item, heaviest first"""
+        return sorted(((item, c[0], c[1]) for item, c in self.counters.items()),
+                      key=lambda entry: entry[1], reverse=True)
@@ -1,6 +1,41 @@
 #!/usr/bin/env python3
 import sys
+import os
+import io
+import argparse
 
-for line in sys.stdin:
-    for word in line.strip().split():
-        print(f"{word.lower()}\t1")
+# hadoop_input.py and counting.py come from ../../../common locally and from -files on the cluster
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.extend([HERE, os.path.join(HERE, '..', '..', '..', 'common')])
+from hadoop_input import open_stdin
+from counting import InMapperCombiner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Word count mapper")
+    parser.add_argument('--combine', action='store_true',
+                        help="In-mapper combining: emit partial counts instead of word<TAB>1")
+    parser.add_argument('--memory-mb', type=float, default=64,
+                        help="Memory budget of the combining table in MB (default: 64)")
+    parser.add_argument('--evict', choices=['oldest', 'heaviest'], default='oldest',
+                        help="Entries flushed when the budget is hit (default: oldest)")
+    args = parser.parse_args()
+
+    # Reads the .xml.gz dumps as they are; plain text passes through
+    sys.stdin = io.TextIOWrapper(open_stdin(), encoding=sys.stdin.encoding, errors=sys.stdin.errors)
+
+    if not args.combine:
+        for line in sys.stdin:
+            for word in line.strip().split():
+                print(f"{word.lower()}\t1")
+        return
+
+    combiner = InMapperCombiner(args.memory_mb, args.evict)
+    for line in sys.stdin:
+        for word in line.strip().split():
+            combiner.add(word.lower())
+    combiner.flush()
+
+
+if __name__ == "__main__":
+    main()
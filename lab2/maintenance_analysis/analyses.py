@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Registry of the maintenance log analyses.
+
+Every analysis is a small plugin with these hooks:
+
+    emit(record)               map side: (identifier, value) for one parsed log entry, or None
+    parse(value)               value text (raw or partial) -> state
+    state(value)               emitted value (not text) -> state, for the mapper's combine table
+    merge(state, other)        combine two states
+    serialize(state)           state -> partial value text (combiner output)
+    finalize(identifier, state) reducer side: JSON-ready result dict
+
+`fields` lists the parsed log fields emit() reads and `requires` the derived
+values ('time', 'severity') the mapper has to compute for it, so a run with
+only a few analyses enabled does not pay for the others.
+
+Adding an analysis means subclassing CountAnalysis/DowntimeAnalysis (or
+Analysis) and decorating the class with @register; mapper.py and reducer.py
+pick it up without changes. All hooks but state() are abstract, so a class
+that lacks one fails at import, when @register instantiates it. The mapper
+emits `name<TAB>identifier<TAB>value`.
+`weight` is the analysis' share of the reduce work when partitioner.py
+spreads the analyses over the reducers.
+
+An analysis with `secondary_sort` emits `name<TAB>identifier<TAB>order<TAB>value`
+instead: the order field (a timestamp) is the third key field, so each
+identifier's records reach the reducer sorted by it. Such analyses are not
+combinable; the mapper and combiner pass their records through.
+"""
+
+import abc
+import os
+from datetime import datetime, timezone
+
+from tdigest import TDigest
+
+PARTIAL_PREFIX = 'P|'
+ENV_VARIABLE = 'MAINTENANCE_ANALYSES'
+
+ANALYSES = {}
+
+
+def register(cls):
+    """Class decorator: add an analysis to the registry (in definition order)"""
+    ANALYSES[cls.name] = cls()
+    return cls
+
+
+def select_analyses(names=None):
+    """
+    Enabled analyses in registry order. names is a comma-separated string or
+    list; without it the MAINTENANCE_ANALYSES environment variable is used,
+    and without that every analysis is enabled.
+    """
+    if names is None:
+        names = os.environ.get(ENV_VARIABLE, '')
+    if isinstance(names, str):
+        names = [name.strip() for name in names.split(',') if name.strip()]
+    if not names or names == ['all']:
+        return list(ANALYSES.values())
+    unknown = [name for name in names if name not in ANALYSES]
+    if unknown:
+        raise ValueError(f"unknown analyses: {', '.join(unknown)} (available: {', '.join(ANALYSES)})")
+    return [analysis for name, analysis in ANALYSES.items() if name in names]
+
+
+class Analysis(abc.ABC):
+    """
+    Base class of all analyses.
+    """
+
+    name = ''          # tag in the map output
+    title = ''         # 'analysis' field of the result
+    fields = ()        # parsed log fields used by emit()
+    requires = ()      # derived values used by emit(): 'time', 'severity'
+    weight = 1         # relative reduce work, for partitioner.py
+    secondary_sort = False  # value starts with a sort field that is part of the map output key
+    combinable = True       # partials can be merged in any order (mapper/combiner pre-aggregation)
+    state_bytes = 100       # approx. memory of one state, for the mapper's combine budget
+
+    @abc.abstractmethod
+    def emit(self, record):
+        """(identifier, value) of a parsed log entry, or None"""
+
+    @abc.abstractmethod
+    def parse(self, value):
+        """State of a value text (raw or partial)"""
+
+    def state(self, value):
+        return self.parse(str(value))
+
+    @abc.abstractmethod
+    def merge(self, state, other):
+        """Combination of two states"""
+
+    @abc.abstractmethod
+    def serialize(self, state):
+        """Partial value text of a state"""
+
+    @abc.abstractmethod
+    def finalize(self, identifier, state):
+        """JSON-ready result dict"""
+
+
+class CountAnalysis(Analysis):
+    """
+    Number of log entries per identifier. States and partials are plain counts.
+    """
+
+    identifier_field = ''   # result key of the identifier
+    count_field = 'count'   # result key of the count
+
+    state_bytes = 32
+
+    def parse(self, value):
+        return int(value)
+
+    def state(self, value):
+        return value
+
+    def merge(self, state, other):
+        return state + other
+
+    def serialize(self, state):
+        return str(state)
+
+    def finalize(self, identifier, state):
+        return {
+            'analysis': self.title,
+            self.identifier_field: identifier,
+            self.count_field: state
+        }
+
+
+class DowntimeAnalysis(Analysis):
+    """
+    Downtime hours per machine. The state is [count, sum, min, max, digest]
+    and the partial value P|count|sum|min|max, followed by |digest for
+    analyses that report percentiles; raw values are single durations.
+    The digest (tdigest.py) is only built once a second value arrives.
+    """
+
+    fields = ('machine_id', 'duration')
+    key_field = 'machine_id'   # identifier of the map output
+    threshold = 0              # only entries with a longer duration are counted
+    quantiles = ()             # percentiles reported by finalize(), e.g. (50, 95, 99)
+    compression = 100          # t-digest size (about this many centroids per key)
+
+    def emit(self, record):
+        if record['duration'] > self.threshold:
+            return record[self.key_field], record['duration']
+        return None
+
+    def parse(self, value):
+        if value.startswith(PARTIAL_PREFIX):
+            count, total, low, high, *digest = value[len(PARTIAL_PREFIX):].split('|')
+            digest = TDigest.from_string(digest[0], self.compression) if digest and self.quantiles else None
+            return [int(count), float(total), float(low), float(high), digest]
+        duration = float(value)
+        return [1, duration, duration, duration, None]
+
+    def state(self, value):
+        return [1, value, value, value, None]
+
+    @property
+    def state_bytes(self):
+        # List of five plus, with percentiles, a digest of up to about `compression` centroids
+        return 200 + (64 * self.compression if self.quantiles else 0)
+
+    def digest(self, state):
+        """The state's digest; states without one hold count values of average size"""
+        if state[4] is None:
+            digest = TDigest(self.compression)
+            digest.add(state[1] / state[0], state[0])
+            digest.low, digest.high = state[2], state[3]
+            state[4] = digest
+        return state[4]
+
+    def merge(self, state, other):
+        if self.quantiles:
+            self.digest(state).merge(self.digest(other))
+        state[0] += other[0]
+        state[1] += other[1]
+        if other[2] < state[2]:
+            state[2] = other[2]
+        if other[3] > state[3]:
+            state[3] = other[3]
+        return state
+
+    def serialize(self, state):
+        count, total, low, high, _ = state
+        if self.quantiles:
+            return f"{PARTIAL_PREFIX}{count}|{total}|{low}|{high}|{self.digest(state).to_string()}"
+        return f"{PARTIAL_PREFIX}{count}|{total}|{low}|{high}"
+
+    def percentiles(self, state, suffix):
+        """Estimated percentiles of the state, keyed p50_<suffix>, ..."""
+        digest = self.digest(state)
+        return {f"p{p}_{suffix}": digest.quantile(p / 100) for p in self.quantiles}
+
+
+# Registration order is the order of the map output records per log entry
+
+@register
+class ComponentFailure(CountAnalysis):
+    """Failures per component"""
+    name = 'component_failure'
+    title = 'component_failure_frequency'
+    fields = ('component',)
+    identifier_field = 'component'
+    count_field = 'failure_count'
+
+    def emit(self, record):
+        return record['component'], 1
+
+
+@register
+class MachineDowntime(DowntimeAnalysis):
+    """Downtime statistics per machine"""
+    name = 'machine_downtime'
+    title = 'machine_downtime_stats'
+    quantiles = (50, 95, 99)
+    weight = 2
+
+    def finalize(self, identifier, state):
+        count, total, _, highest, _ = state
+        result = {
+            'analysis': self.title,
+            'machine_id': identifier,
+            'total_downtime_hours': total,
+            'average_downtime_hours': total / count,
+            'max_downtime_hours': highest,
+            'incident_count': count
+        }
+        result.update(self.percentiles(state, 'downtime_hours'))
+        return result
+
+
+@register
+class SeverityDistribution(CountAnalysis):
+    """Entries per severity category"""
+    name = 'severity_dist'
+    title = 'severity_distribution'
+    fields = ('severity', 'description')
+    requires = ('severity',)
+    identifier_field = 'severity'
+
+    def emit(self, record):
+        return record['severity_category'], 1
+
+
+@register
+class HourlyPattern(CountAnalysis):
+    """Maintenance frequency by hour"""
+    name = 'hourly_pattern'
+    title = 'hourly_maintenance_pattern'
+    fields = ('timestamp',)
+    requires = ('time',)
+    identifier_field = 'hour'
+    count_field = 'maintenance_count'
+
+    def emit(self, record):
+        return record['time']['hour'], 1
+
+    def finalize(self, identifier, state):
+        return super().finalize(int(identifier), state)
+
+
+@register
+class MonthlyTrend(CountAnalysis):
+    """Maintenance frequency by month"""
+    name = 'monthly_trend'
+    title = 'monthly_maintenance_trend'
+    fields = ('timestamp',)
+    requires = ('time',)
+    identifier_field = 'month'
+    count_field = 'maintenance_count'
+
+    def emit(self, record):
+        time_info = record['time']
+        return f"{time_info['year']}-{time_info['month']:02d}", 1
+
+
+@register
+class TechnicianLoad(CountAnalysis):
+    """Tasks per technician"""
+    name = 'technician_load'
+    title = 'technician_workload'
+    fields = ('technician',)
+    identifier_field = 'technician'
+    count_field = 'task_count'
+
+    def emit(self, record):
+        if record['technician']:
+            return record['technician'], 1
+        return None
+
+
+@register
+class ActionType(CountAnalysis):
+    """Frequency of the action types"""
+    name = 'action_type'
+    title = 'action_type_frequency'
+    fields = ('action',)
+    identifier_field = 'action'
+
+    def emit(self, record):
+        return record['action'], 1
+
+
+@register
+class MachineComponent(CountAnalysis):
+    """Machine-component failure correlation"""
+    name = 'machine_component'
+    title = 'machine_component_correlation'
+    fields = ('machine_id', 'component')
+    weight = 4   # one key per machine and component
+
+    def emit(self, record):
+        return f"{record['machine_id']}:{record['component']}", 1
+
+    def finalize(self, identifier, state):
+        machine_id, component = identifier.split(':', 1)
+        return {
+            'analysis': self.title,
+            'machine_id': machine_id,
+            'component': component,
+            'failure_count': state
+        }
+
+
+@register
+class CriticalDowntime(DowntimeAnalysis):
+    """Extended downtime incidents per machine"""
+    name = 'critical_downtime'
+    title = 'critical_downtime_incidents'
+    threshold = 240  # 4 hours
+
+    def finalize(self, identifier, state):
+        count, total, _, highest, _ = state
+        return {
+            'analysis': self.title,
+            'machine_id': identifier,
+            'total_critical_hours': total,
+            'incident_count': count,
+            'max_critical_hours': highest
+        }
+
+
+@register
+class ComponentDowntime(DowntimeAnalysis):
+    """Downtime statistics and percentiles per component"""
+    name = 'component_downtime'
+    title = 'component_downtime_stats'
+    fields = ('component', 'duration')
+    key_field = 'component'
+    quantiles = (50, 95, 99)
+    weight = 2
+
+    def finalize(self, identifier, state):
+        count, total, _, highest, _ = state
+        result = {
+            'analysis': self.title,
+            'component': identifier,
+            'total_downtime_hours': total,
+            'average_downtime_hours': total / count,
+            'max_downtime_hours': highest,
+            'incident_count': count
+        }
+        result.update(self.percentiles(state, 'downtime_hours'))
+        return result
+
+
+@register
+class FailureInterval(Analysis):
+    """
+    Time between failures per machine and component, from the records in
+    timestamp order (secondary sort). The reducer keeps O(1) state per
+    group: the number of failures, first and previous failure time, running
+    mean/M2 (Welford) and min/max of the gaps, the repair time, and a
+    t-digest of the gaps.
+    """
+    name = 'failure_interval'
+    title = 'failure_intervals'
+    fields = ('timestamp', 'machine_id', 'component', 'action', 'duration')
+    secondary_sort = True
+    combinable = False
+    weight = 2
+    failure_actions = ('CORRECTIVE_REPAIR', 'EMERGENCY_REPAIR', 'REPLACEMENT')
+    quantiles = (10, 50, 90)
+    compression = 100
+    epoch = datetime(1970, 1, 1)
+
+    def emit(self, record):
+        if record['action'] not in self.failure_actions:
+            return None
+        try:
+            moment = datetime.fromisoformat(record['timestamp'].replace('Z', '+00:00'))
+        except ValueError:
+            return None
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+        # UTC without offset, so the text order is the time order
+        return f"{record['machine_id']}:{record['component']}", f"{moment.isoformat()}\t{record['duration']}"
+
+    def parse(self, value):
+        timestamp, duration = value.split('\t')
+        seconds = (datetime.fromisoformat(timestamp) - self.epoch).total_seconds()
+        # count, first, last (seconds), gaps, gap mean, gap M2, min gap, max gap (hours),
+        # repair hours, gap digest, first/last text
+        return [1, seconds, seconds, 0, 0.0, 0.0, None, None, float(duration), None, timestamp, timestamp]
+
+    def merge(self, state, other):
+        """Append the next failure (other holds one record)"""
+        gap = (other[1] - state[2]) / 3600
+        state[0] += 1
+        state[2] = other[1]
+        state[11] = other[10]
+        state[8] += other[8]
+        state[3] += 1
+        delta = gap - state[4]
+        state[4] += delta / state[3]
+        state[5] += delta * (gap - state[4])
+        if state[6] is None or gap < state[6]:
+            state[6] = gap
+        if state[7] is None or gap > state[7]:
+            state[7] = gap
+        if state[9] is None:
+            state[9] = TDigest(self.compression)
+        state[9].add(gap)
+        return state
+
+    def serialize(self, state):
+        raise TypeError(f"{self.name} records are not combinable")
+
+    def finalize(self, identifier, state):
+        count, _, _, gaps, mean, m2, low, high, repair, digest, first, last = state
+        machine_id, component = identifier.split(':', 1)
+        result = {
+            'analysis': self.title,
+            'machine_id': machine_id,
+            'component': component,
+            'failure_count': count,
+            'first_failure': first,
+            'last_failure': last,
+            'mtbf_hours': mean if gaps else None,
+            'gap_stddev_hours': (m2 / (gaps - 1)) ** 0.5 if gaps > 1 else None,
+            'min_gap_hours': low,
+            'max_gap_hours': high,
+            'mean_repair_hours': repair / count
+        }
+        for p in self.quantiles:
+            result[f"p{p}_gap_hours"] = digest.quantile(p / 100) if digest else None
+        return result
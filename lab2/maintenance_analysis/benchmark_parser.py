@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the mapper's original parse_log_entry against ProjectedLogParser.
+
+Writes a JSON and a pipe-separated log (sample records from
+generate_sample_data.py, repeated up to --lines), parses each with the full
+parser and with the projected parser for a few field sets, and checks that
+the projected records equal the corresponding fields of the full ones.
+Records are not kept in memory, so 10M-line runs need only disk space.
+
+    python3 benchmark_parser.py                    # 1M lines per format
+    python3 benchmark_parser.py --lines 10000000
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from generate_sample_data import generate_sample_maintenance_logs
+from mapper import LOG_FIELDS, ProjectedLogParser
+
+PROJECTIONS = {
+    'all fields': LOG_FIELDS,
+    'machine_downtime': ('machine_id', 'duration'),
+    'component_failure': ('component',),
+}
+
+
+def write_logs(directory, num_lines):
+    """JSON and pipe versions of the same num_lines records"""
+    random.seed(42)
+    sample = generate_sample_maintenance_logs(10000)
+    paths = {'json': os.path.join(directory, 'logs.json'), 'pipe': os.path.join(directory, 'logs.pipe')}
+    with open(paths['json'], 'w') as json_file, open(paths['pipe'], 'w') as pipe_file:
+        for line in itertools.islice(itertools.cycle(sample), num_lines):
+            json_file.write(line + '\n')
+            data = json.loads(line)
+            pipe_file.write('|'.join(str(data[name]) for name in LOG_FIELDS) + '\n')
+    return paths
+
+
+def parse_log_entry(line):
+    """The mapper's original parser: every field of a log entry, or None"""
+    try:
+        # Handle JSON format
+        if line.strip().startswith('{'):
+            data = json.loads(line.strip())
+            return {
+                'timestamp': data.get('timestamp', ''),
+                'machine_id': data.get('machine_id', ''),
+                'component': data.get('component', ''),
+                'action': data.get('action', ''),
+                'severity': data.get('severity', ''),
+                'duration': float(data.get('duration', 0)),
+                'technician': data.get('technician', ''),
+                'description': data.get('description', '')
+            }
+        else:
+            # Handle pipe-separated format
+            parts = line.strip().split('|')
+            if len(parts) >= 6:
+                return {
+                    'timestamp': parts[0],
+                    'machine_id': parts[1],
+                    'component': parts[2],
+                    'action': parts[3],
+                    'severity': parts[4],
+                    'duration': float(parts[5]) if parts[5].replace('.', '').isdigit() else 0,
+                    'technician': parts[6] if len(parts) > 6 else '',
+                    'description': parts[7] if len(parts) > 7 else ''
+                }
+    except (json.JSONDecodeError, ValueError, IndexError):
+        return None
+
+    return None
+
+
+class FullParser:
+    """parse_log_entry behind the same parse() interface"""
+
+    def parse(self, line):
+        return parse_log_entry(line)
+
+
+def time_parser(path, make_parser, repeats):
+    """Best wall time of parsing every line of path with a fresh parser"""
+    best = None
+    for _ in range(repeats):
+        parser = make_parser()
+        with open(path) as f:
+            start = time.perf_counter()
+            for line in f:
+                parser.parse(line)
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def same_records(path, full, projected):
+    """True if the projected parser returns the requested fields of every full record"""
+    with open(path) as f:
+        for line in f:
+            record = full(line)
+            if record is not None:
+                record = {name: record[name] for name in projected.fields}
+            if projected.parse(line) != record:
+                return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the full and the projected log parser")
+    parser.add_argument('--lines', type=int, default=1000000, help="Lines per format (default: 1000000)")
+    parser.add_argument('--repeats', type=int, default=3, help="Runs per parser (default: 3)")
+    args = parser.parse_args()
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_logs(tmp, args.lines)
+        for fmt, path in paths.items():
+            full_time = time_parser(path, FullParser, args.repeats)
+            print(f"{fmt}: {os.path.getsize(path) / 1e6:.0f} MB, {args.lines} lines")
+            print(f"  parse_log_entry:              {full_time:6.2f} s")
+            for label, fields in PROJECTIONS.items():
+                elapsed = time_parser(path, lambda: ProjectedLogParser(fields), args.repeats)
+                same = same_records(path, parse_log_entry, ProjectedLogParser(fields))
+                ok = ok and same
+                print(f"  projected ({label + '):':18} {elapsed:6.2f} s  {full_time / elapsed:4.1f}x"
+                      f"  {'identical' if same else 'DIFFERENT'}")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,128 +6,362 @@ timestamp|machine_id|component|action|severity|duration|technician|description
 """
 
 import sys
+import os
 import json
 import re
-from datetime import datetime
+import argparse
+from itertools import islice
+
+# timestamp_buckets.py comes from ../../common locally and from -files on the cluster
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.extend([HERE, os.path.join(HERE, '..', '..', 'common')])
+from timestamp_buckets import hour_bucket
+
+from analyses import ANALYSES, ENV_VARIABLE, select_analyses
+from partitioner import AnalysisPartitioner
+
+# Pipe format column order
+LOG_FIELDS = ('timestamp', 'machine_id', 'component', 'action',
+              'severity', 'duration', 'technician', 'description')
+# Log fields behind the derived values of analyses.py
+DERIVED_FIELDS = {'time': ('timestamp',), 'severity': ('description', 'severity')}
+
+
+def column_record(columns):
+    """
+    parts -> {name: parts[index]} for (name, index) columns. A dict display
+    builds a record about twice as fast as a comprehension, so the usual
+    small projections get one.
+    """
+    if len(columns) == 1:
+        (name, index), = columns
+        return lambda parts: {name: parts[index]}
+    if len(columns) == 2:
+        (name1, index1), (name2, index2) = columns
+        return lambda parts: {name1: parts[index1], name2: parts[index2]}
+    if len(columns) == 3:
+        (name1, index1), (name2, index2), (name3, index3) = columns
+        return lambda parts: {name1: parts[index1], name2: parts[index2], name3: parts[index3]}
+    return lambda parts: {name: parts[index] for name, index in columns}
+
+
+class ProjectedLogParser:
+    """
+    Parser that extracts only the requested fields of a log entry.
+    
+    The format is sniffed from the first non-empty line and its parse method
+    is used from then on; a line of the other format is still handled. Pipe
+    lines are split only up to the last needed column. When only a few
+    fields are needed, JSON lines are read by slicing `"field": value` out
+    of the text if the values are plain (no escapes, usual spacing);
+    other lines and larger projections go through json.loads.
+    Records are checked only on the fields that are read: pipe lines need
+    at least six columns, missing technician/description read as '', and a
+    non-numeric pipe duration reads as 0.
+    """
+    
+    # Up to this many fields slicing JSON text beats json.loads
+    JSON_SLICE_FIELDS = 3
+    
+    def __init__(self, fields=LOG_FIELDS):
+        self.fields = tuple(name for name in LOG_FIELDS if name in fields)
+        self.with_duration = 'duration' in self.fields
+        self.columns = [(name, LOG_FIELDS.index(name)) for name in self.fields if name != 'duration']
+        # Pipe lines need at least six columns, whatever is read
+        self.max_split = max([5] + [index for _, index in self.columns]) + 1
+        self.min_parts = max([6] + [index + 1 for _, index in self.columns])
+        self.padding = [''] * self.min_parts
+        columns = self.columns
+        self.pipe_record = column_record(columns)
+        self.json_record = lambda data: {name: data.get(name, '') for name, _ in columns}
+        if len(self.fields) == len(LOG_FIELDS):
+            # Every field: nothing to project, split and decode whole lines
+            self.parse_pipe, self.parse_json = self.parse_full_pipe, self.parse_full_json
+        self.json_keys = [(name, f'"{name}": ') for name in self.fields]
+        self.slice_json = len(self.fields) <= self.JSON_SLICE_FIELDS
+    
+    def parse(self, line):
+        """Projected record dict, or None for blank and malformed lines"""
+        stripped = line.strip()
+        if not stripped:
+            return None
+        # Sniff the format once: the instance attribute replaces this method
+        self.parse = self.parse_json if stripped[0] == '{' else self.parse_pipe
+        return self.parse(stripped)
+    
+    def parse_pipe(self, line):
+        line = line.strip()
+        if not line:
+            return None
+        if line[0] == '{':
+            return self.parse_json(line)
+        parts = line.split('|', self.max_split)
+        if len(parts) < 6:
+            return None
+        if len(parts) < self.min_parts:
+            parts += self.padding  # missing technician/description read as ''
+        record = self.pipe_record(parts)
+        if self.with_duration:
+            value = parts[5]
+            try:
+                record['duration'] = float(value) if value.replace('.', '').isdigit() else 0
+            except ValueError:
+                return None
+        return record
+    
+    def parse_json(self, line):
+        line = line.strip()
+        if not line:
+            return None
+        if line[0] != '{':
+            return self.parse_pipe(line)
+        if not self.slice_json or line[-1] != '}':
+            return self.parse_json_slow(line)
+        record = {}
+        for name, key in self.json_keys:
+            start = line.find(key)
+            if start < 0:
+                return self.parse_json_slow(line)
+            start += len(key)
+            if line.startswith('"', start):
+                end = line.find('"', start + 1)
+                value = line[start + 1:end]
+                if end < 0 or '\\' in value or name == 'duration':
+                    return self.parse_json_slow(line)
+                record[name] = value
+            elif name == 'duration':
+                end = line.find(',', start)
+                if end < 0:
+                    end = len(line) - 1
+                try:
+                    record[name] = float(line[start:end])
+                except ValueError:
+                    return self.parse_json_slow(line)
+            else:
+                return self.parse_json_slow(line)
+        return record
+    
+    def parse_json_slow(self, line):
+        try:
+            data = json.loads(line)
+            record = self.json_record(data)
+            if self.with_duration:
+                record['duration'] = float(data.get('duration', 0))
+            return record
+        except (json.JSONDecodeError, ValueError, IndexError):
+            return None
+    
+    def parse_full_pipe(self, line):
+        line = line.strip()
+        if not line:
+            return None
+        if line[0] == '{':
+            return self.parse_json(line)
+        parts = line.split('|')
+        count = len(parts)
+        if count < 6:
+            return None
+        duration = parts[5]
+        try:
+            return {
+                'timestamp': parts[0],
+                'machine_id': parts[1],
+                'component': parts[2],
+                'action': parts[3],
+                'severity': parts[4],
+                'duration': float(duration) if duration.replace('.', '').isdigit() else 0,
+                'technician': parts[6] if count > 6 else '',
+                'description': parts[7] if count > 7 else ''
+            }
+        except ValueError:
+            return None
+    
+    def parse_full_json(self, line):
+        line = line.strip()
+        if not line:
+            return None
+        if line[0] != '{':
+            return self.parse_pipe(line)
+        try:
+            data = json.loads(line)
+            return {
+                'timestamp': data.get('timestamp', ''),
+                'machine_id': data.get('machine_id', ''),
+                'component': data.get('component', ''),
+                'action': data.get('action', ''),
+                'severity': data.get('severity', ''),
+                'duration': float(data.get('duration', 0)),
+                'technician': data.get('technician', ''),
+                'description': data.get('description', '')
+            }
+        except (json.JSONDecodeError, ValueError):
+            return None
 
 class MaintenanceLogMapper:
     """
     Mapper for processing maintenance log entries.
     """
     
-    def __init__(self):
+    SEVERITY_CACHE_SIZE = 4096  # distinct (description, severity) pairs remembered
+    ENTRY_OVERHEAD = 150        # approx. bytes per combine table entry besides the state (key tuple, identifier)
+    FLUSH_FRACTION = 0.5        # share of the combine table flushed when the budget is hit
+    
+    def __init__(self, analyses=None, combine=False, partition_hints=0, memory_mb=64):
+        self.analyses = analyses if analyses is not None else list(ANALYSES.values())
+        # Hint field for KeyFieldBasedPartitioner -k1,1 (partitioner.py)
+        self.partitioner = AnalysisPartitioner(self.analyses, partition_hints) if partition_hints else None
+        self.needs_time = any('time' in a.requires for a in self.analyses)
+        self.needs_severity = any('severity' in a.requires for a in self.analyses)
+        self.combine = combine
+        self.partials = {}  # (analysis, identifier) -> state, in combine mode
+        self.budget = int(memory_mb * 1024 * 1024)
+        self.used = 0
+        fields = set()
+        for analysis in self.analyses:
+            fields.update(analysis.fields)
+            for derived in analysis.requires:
+                fields.update(DERIVED_FIELDS[derived])
+        self.parser = ProjectedLogParser(fields)
         self.error_patterns = {
             'CRITICAL': ['critical', 'fatal', 'emergency', 'severe'],
             'WARNING': ['warning', 'warn', 'caution', 'alert'],
             'INFO': ['info', 'normal', 'routine', 'scheduled'],
             'ERROR': ['error', 'fail', 'fault', 'malfunction']
         }
-    
-    def parse_log_entry(self, line):
-        """Parse a log entry and extract relevant fields"""
-        try:
-            # Handle JSON format
-            if line.strip().startswith('{'):
-                data = json.loads(line.strip())
-                return {
-                    'timestamp': data.get('timestamp', ''),
-                    'machine_id': data.get('machine_id', ''),
-                    'component': data.get('component', ''),
-                    'action': data.get('action', ''),
-                    'severity': data.get('severity', ''),
-                    'duration': float(data.get('duration', 0)),
-                    'technician': data.get('technician', ''),
-                    'description': data.get('description', '')
-                }
-            else:
-                # Handle pipe-separated format
-                parts = line.strip().split('|')
-                if len(parts) >= 6:
-                    return {
-                        'timestamp': parts[0],
-                        'machine_id': parts[1],
-                        'component': parts[2],
-                        'action': parts[3],
-                        'severity': parts[4],
-                        'duration': float(parts[5]) if parts[5].replace('.', '').isdigit() else 0,
-                        'technician': parts[6] if len(parts) > 6 else '',
-                        'description': parts[7] if len(parts) > 7 else ''
-                    }
-        except (json.JSONDecodeError, ValueError, IndexError):
-            return None
-        
-        return None
+        self.severity_categories = list(self.error_patterns)
+        self.severity_matcher = self.compile_error_patterns()
+        self.severity_cache = {}
     
     def extract_time_components(self, timestamp):
         """Extract hour, day of week, month from timestamp"""
         try:
-            dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+            # Cached per date and hour (common/timestamp_buckets.py)
+            bucket = hour_bucket(timestamp.replace('Z', '+00:00'))
             return {
-                'hour': dt.hour,
-                'day_of_week': dt.weekday(),
-                'month': dt.month,
-                'year': dt.year
+                'hour': bucket.hour,
+                'day_of_week': bucket.weekday,
+                'month': bucket.month,
+                'year': bucket.year
             }
         except:
             return {'hour': 0, 'day_of_week': 0, 'month': 1, 'year': 2024}
     
+    def compile_error_patterns(self):
+        """
+        One regex for all keywords: a lookahead, so overlapping keywords are
+        all found, with one group per category in priority order.
+        """
+        groups = '|'.join('(' + '|'.join(re.escape(keyword) for keyword in keywords) + ')'
+                          for keywords in self.error_patterns.values())
+        return re.compile(f'(?=(?:{groups}))')
+    
     def categorize_severity(self, description, severity):
         """Categorize severity based on keywords in description"""
+        key = (description, severity)
+        category = self.severity_cache.get(key)
+        if category is not None:
+            return category
+        
         text = (description + ' ' + severity).lower()
         
-        for category, keywords in self.error_patterns.items():
-            if any(keyword in text for keyword in keywords):
-                return category
+        # First category (in error_patterns order) with any keyword in the text
+        best = None
+        for match in self.severity_matcher.finditer(text):
+            if best is None or match.lastindex < best:
+                best = match.lastindex
+                if best == 1:
+                    break
+        category = self.severity_categories[best - 1] if best else 'UNKNOWN'
         
-        return 'UNKNOWN'
+        if len(self.severity_cache) >= self.SEVERITY_CACHE_SIZE:
+            self.severity_cache.clear()
+        self.severity_cache[key] = category
+        return category
+    
+    def combine_record(self, analysis, identifier, value):
+        """Fold one record into the in-mapper table (combine mode)"""
+        key = (analysis, identifier)
+        state = self.partials.get(key)
+        if state is None:
+            self.partials[key] = analysis.state(value)
+            self.used += analysis.state_bytes + self.ENTRY_OVERHEAD
+            if self.used > self.budget:
+                self.flush_some()
+        else:
+            self.partials[key] = analysis.merge(state, analysis.state(value))
+    
+    def flush_some(self):
+        """Emit and drop the oldest part of the table when it outgrows the budget"""
+        n = max(1, int(len(self.partials) * self.FLUSH_FRACTION))
+        # dicts keep insertion order, so the first keys are the oldest
+        for key in list(islice(self.partials, n)):
+            analysis, identifier = key
+            self.emit(analysis, identifier, analysis.serialize(self.partials.pop(key)))
+            self.used -= analysis.state_bytes + self.ENTRY_OVERHEAD
+    
+    def flush(self):
+        """Emit the pre-aggregated records as partials (combine mode)"""
+        for (analysis, identifier), state in self.partials.items():
+            self.emit(analysis, identifier, analysis.serialize(state))
+        self.partials.clear()
+        self.used = 0
+    
+    def emit(self, analysis, identifier, value):
+        """Write one map output record, behind its hint field if partitioning"""
+        if self.partitioner:
+            hint = self.partitioner.hint(analysis.name, identifier)
+            print(f"{hint}\t{analysis.name}\t{identifier}\t{value}")
+        else:
+            print(f"{analysis.name}\t{identifier}\t{value}")
     
     def map(self, line):
         """Main mapper function"""
-        data = self.parse_log_entry(line)
+        data = self.parser.parse(line)
         if not data:
             return
         
-        time_info = self.extract_time_components(data['timestamp'])
-        severity_category = self.categorize_severity(data['description'], data['severity'])
-        
-        # Emit multiple key-value pairs for different analyses
-        
-        # 1. Component failure frequency
-        print(f"component_failure\t{data['component']}\t1")
-        
-        # 2. Machine downtime analysis
-        if data['duration'] > 0:
-            print(f"machine_downtime\t{data['machine_id']}\t{data['duration']}")
-        
-        # 3. Severity distribution
-        print(f"severity_dist\t{severity_category}\t1")
+        # Derived values only when an enabled analysis uses them
+        if self.needs_time:
+            data['time'] = self.extract_time_components(data['timestamp'])
+        if self.needs_severity:
+            data['severity_category'] = self.categorize_severity(data['description'], data['severity'])
         
-        # 4. Hourly maintenance patterns
-        print(f"hourly_pattern\t{time_info['hour']}\t1")
-        
-        # 5. Monthly trends
-        print(f"monthly_trend\t{time_info['year']}-{time_info['month']:02d}\t1")
-        
-        # 6. Technician workload
-        if data['technician']:
-            print(f"technician_load\t{data['technician']}\t1")
-        
-        # 7. Action type analysis
-        print(f"action_type\t{data['action']}\t1")
-        
-        # 8. Machine-component failure correlation
-        print(f"machine_component\t{data['machine_id']}:{data['component']}\t1")
-        
-        # 9. Critical issues (duration > threshold)
-        if data['duration'] > 240:  # 4 hours
-            print(f"critical_downtime\t{data['machine_id']}\t{data['duration']}")
+        # One key-value pair per enabled analysis (see analyses.py)
+        for analysis in self.analyses:
+            emitted = analysis.emit(data)
+            if emitted is None:
+                continue
+            identifier, value = emitted
+            if self.combine and analysis.combinable:
+                self.combine_record(analysis, identifier, value)
+            else:
+                self.emit(analysis, identifier, value)
 
 def main():
     """Main mapper execution"""
-    mapper = MaintenanceLogMapper()
+    parser = argparse.ArgumentParser(description="Maintenance log mapper")
+    parser.add_argument('--combine', action='store_true',
+                        help="Pre-aggregate per key in the mapper and emit partial records")
+    parser.add_argument('--memory-mb', type=float, default=64,
+                        help="Memory budget of the --combine table in MB; the oldest half is flushed "
+                             "when it is exceeded (default: 64)")
+    parser.add_argument('--analyses', metavar='NAME,...',
+                        help=f"Analyses to run (default: ${ENV_VARIABLE} or all): {', '.join(ANALYSES)}")
+    parser.add_argument('--partition-hints', type=int, default=0, metavar='R',
+                        help="Prefix every record with a hint field that routes its analysis to its own "
+                             "reducers out of R (see partitioner.py)")
+    args = parser.parse_args()
+    
+    try:
+        analyses = select_analyses(args.analyses)
+    except ValueError as e:
+        parser.error(str(e))
+    mapper = MaintenanceLogMapper(analyses, combine=args.combine, partition_hints=args.partition_hints,
+                                  memory_mb=args.memory_mb)
     
     for line in sys.stdin:
         mapper.map(line)
+    mapper.flush()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
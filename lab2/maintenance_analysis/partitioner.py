@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Analysis-type partitioning for the maintenance job.
+
+Hadoop Streaming cannot run a Python partitioner, but KeyFieldBasedPartitioner
+can be told to hash only the first key field. The mapper (--partition-hints R)
+therefore puts a short hint field in front of every record whose Java hash
+lands on the reducer chosen for it:
+
+    @3k<TAB>machine_component<TAB>MACHINE_021:ENGINE<TAB>1
+
+    -D stream.num.map.output.key.fields=4    # hint, analysis, identifier, order
+    -D mapreduce.partition.keypartitioner.options=-k1,1
+    -partitioner org.apache.hadoop.mapred.lib.KeyFieldBasedPartitioner
+
+The reducers are divided among the enabled analyses by their `weight`
+(analyses.py): with at least as many reducers as analyses every analysis gets
+its own reducers and heavy, high-cardinality ones such as machine_component
+get several (their identifiers spread over them by CRC32); with fewer
+reducers the analyses are packed onto the least loaded ones. reducer.py
+recognises and drops the hint field.
+
+    python3 partitioner.py --reducers 12     # print the plan
+"""
+
+import argparse
+import os
+import sys
+import zlib
+
+# java_hash.py comes from ../../common locally and from -files on the cluster
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.extend([HERE, os.path.join(HERE, '..', '..', 'common')])
+from java_hash import java_bytes_hash
+
+from analyses import ENV_VARIABLE, select_analyses
+
+HINT_PREFIX = '@'
+HINT_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def reducer_of(hint, num_reducers):
+    """Reducer KeyFieldBasedPartitioner -k1,1 sends a record with this hint to"""
+    # KeyFieldBasedPartitioner hashes the key fields starting from 0
+    return (java_bytes_hash(hint.encode('utf-8'), current=0) & 0x7FFFFFFF) % num_reducers
+
+
+def make_hints(num_reducers):
+    """Shortest hint strings, one per reducer, that hash to that reducer"""
+    hints = [None] * num_reducers
+    missing = num_reducers
+    number = 0
+    while missing:
+        text = ''
+        value = number
+        while True:
+            value, digit = divmod(value, len(HINT_DIGITS))
+            text = HINT_DIGITS[digit] + text
+            if not value:
+                break
+        hint = HINT_PREFIX + text
+        reducer = reducer_of(hint, num_reducers)
+        if hints[reducer] is None:
+            hints[reducer] = hint
+            missing -= 1
+        number += 1
+    return hints
+
+
+def plan_slots(analyses, num_reducers):
+    """Reducer numbers of every analysis: {name: [reducer, ...]}"""
+    if num_reducers <= len(analyses):
+        # Heaviest first onto the least loaded reducer
+        load = [0] * num_reducers
+        slots = {}
+        for analysis in sorted(analyses, key=lambda a: -a.weight):
+            reducer = load.index(min(load))
+            load[reducer] += analysis.weight
+            slots[analysis.name] = [reducer]
+        return slots
+    # One reducer each, the rest to the highest weight per reducer
+    counts = {analysis.name: 1 for analysis in analyses}
+    weights = {analysis.name: analysis.weight for analysis in analyses}
+    for _ in range(num_reducers - len(analyses)):
+        name = max(counts, key=lambda n: weights[n] / counts[n])
+        counts[name] += 1
+    slots = {}
+    first = 0
+    for analysis in analyses:
+        slots[analysis.name] = list(range(first, first + counts[analysis.name]))
+        first += counts[analysis.name]
+    return slots
+
+
+class AnalysisPartitioner:
+    """
+    Hint field of a map output record: hint(analysis, identifier).
+    """
+
+    def __init__(self, analyses, num_reducers):
+        self.num_reducers = num_reducers
+        self.slots = plan_slots(analyses, num_reducers)
+        self.hints = make_hints(num_reducers)
+        self.single = {name: self.hints[slots[0]] for name, slots in self.slots.items() if len(slots) == 1}
+
+    def reducer(self, name, identifier):
+        slots = self.slots[name]
+        if len(slots) == 1:
+            return slots[0]
+        return slots[zlib.crc32(str(identifier).encode('utf-8')) % len(slots)]
+
+    def hint(self, name, identifier):
+        hint = self.single.get(name)
+        if hint is not None:
+            return hint
+        return self.hints[self.reducer(name, identifier)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the reducers of every maintenance analysis")
+    parser.add_argument('--reducers', type=int, required=True, help="Number of reduce tasks")
+    parser.add_argument('--analyses', metavar='NAME,...', help=f"Enabled analyses (default: ${ENV_VARIABLE} or all)")
+    args = parser.parse_args()
+
+    try:
+        analyses = select_analyses(args.analyses)
+    except ValueError as e:
+        parser.error(str(e))
+    partitioner = AnalysisPartitioner(analyses, args.reducers)
+    for analysis in analyses:
+        reducers = partitioner.slots[analysis.name]
+        print(f"{analysis.name:20} weight {analysis.weight:<3} reducers "
+              + ','.join(f"{r}({partitioner.hints[r]})" for r in reducers))
+
+
+if __name__ == "__main__":
+    main()
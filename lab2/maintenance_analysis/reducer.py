@@ -4,120 +4,92 @@ Reducer for aggregating maintenance log analysis results
 """
 
 import sys
+import os
 import json
+import argparse
+import subprocess
+
+from analyses import ANALYSES
+from partitioner import HINT_PREFIX
+
+class MultipleOutputs:
+    """
+    Writer in the style of Hadoop's MultipleOutputs: the results of every
+    analysis go to DIR/<analysis>/part-NNNNN, NNNNN being this reduce task's
+    partition (mapreduce_task_partition). A local DIR is written directly;
+    an hdfs:// DIR through `hdfs dfs -put -`, one stream per analysis.
+    """
+    
+    def __init__(self, directory):
+        self.directory = directory
+        self.partition = int(os.environ.get('mapreduce_task_partition', 0))
+        self.files = {}
+        self.processes = []
+    
+    def open(self, name):
+        folder = f"{self.directory.rstrip('/')}/{name}"
+        path = f"{folder}/part-{self.partition:05d}"
+        if self.directory.startswith('hdfs:'):
+            subprocess.run(['hdfs', 'dfs', '-mkdir', '-p', folder], check=True)
+            process = subprocess.Popen(['hdfs', 'dfs', '-put', '-f', '-', path],
+                                       stdin=subprocess.PIPE, text=True)
+            self.processes.append(process)
+            return process.stdin
+        os.makedirs(folder, exist_ok=True)
+        return open(path, 'w')
+    
+    def write(self, name, line):
+        out = self.files.get(name)
+        if out is None:
+            out = self.files[name] = self.open(name)
+        out.write(line + '\n')
+    
+    def close(self):
+        for out in self.files.values():
+            out.close()
+        for process in self.processes:
+            if process.wait() != 0:
+                raise RuntimeError(f"hdfs dfs -put failed with exit code {process.returncode}")
+        self.files.clear()
 
 class MaintenanceLogReducer:
     """
-    Reducer for aggregating maintenance log analysis results
+    Reducer for aggregating maintenance log analysis results.
+    Values are folded into a small state per key as they arrive, using the
+    parse/merge hooks of the key's analysis (analyses.py). In combine mode
+    the state is written back as a partial record instead of the final
+    JSON, so the same class serves as Hadoop combiner.
     """
     
-    def __init__(self):
+    def __init__(self, combine=False, outputs=None):
         self.current_key = None
-        self.current_values = []
+        self.current_analysis = None
+        self.current_identifier = None
+        self.current_state = None
+        self.combine = combine
+        self.outputs = outputs  # MultipleOutputs, or None for stdout
+    
+    def emit_partial(self, key, state):
+        """Combiner output: same key, merged value"""
+        print(f"{key}\t{self.current_analysis.serialize(state)}")
     
-    def emit_result(self, key, values):
+    def emit_result(self, key, state):
         """Process and emit results for a specific key"""
-        key_parts = key.split('\t')
-        analysis_type = key_parts[0]
-        identifier = key_parts[1] if len(key_parts) > 1 else 'unknown'
-        
-        if analysis_type == 'component_failure':
-            # Count failures per component
-            total_failures = sum(int(v) for v in values)
-            result = {
-                'analysis': 'component_failure_frequency',
-                'component': identifier,
-                'failure_count': total_failures
-            }
-            print(json.dumps(result))
-            
-        elif analysis_type == 'machine_downtime':
-            # Calculate downtime statistics per machine
-            downtimes = [float(v) for v in values]
-            result = {
-                'analysis': 'machine_downtime_stats',
-                'machine_id': identifier,
-                'total_downtime_hours': sum(downtimes),
-                'average_downtime_hours': sum(downtimes) / len(downtimes),
-                'max_downtime_hours': max(downtimes),
-                'incident_count': len(downtimes)
-            }
-            print(json.dumps(result))
-            
-        elif analysis_type == 'severity_dist':
-            # Count by severity category
-            count = sum(int(v) for v in values)
-            result = {
-                'analysis': 'severity_distribution',
-                'severity': identifier,
-                'count': count
-            }
-            print(json.dumps(result))
-            
-        elif analysis_type == 'hourly_pattern':
-            # Maintenance frequency by hour
-            count = sum(int(v) for v in values)
-            result = {
-                'analysis': 'hourly_maintenance_pattern',
-                'hour': int(identifier),
-                'maintenance_count': count
-            }
-            print(json.dumps(result))
-            
-        elif analysis_type == 'monthly_trend':
-            # Monthly maintenance trends
-            count = sum(int(v) for v in values)
-            result = {
-                'analysis': 'monthly_maintenance_trend',
-                'month': identifier,
-                'maintenance_count': count
-            }
-            print(json.dumps(result))
-            
-        elif analysis_type == 'technician_load':
-            # Workload per technician
-            count = sum(int(v) for v in values)
-            result = {
-                'analysis': 'technician_workload',
-                'technician': identifier,
-                'task_count': count
-            }
-            print(json.dumps(result))
-            
-        elif analysis_type == 'action_type':
-            # Frequency of different action types
-            count = sum(int(v) for v in values)
-            result = {
-                'analysis': 'action_type_frequency',
-                'action': identifier,
-                'count': count
-            }
-            print(json.dumps(result))
-            
-        elif analysis_type == 'machine_component':
-            # Machine-component failure correlation
-            count = sum(int(v) for v in values)
-            machine_id, component = identifier.split(':', 1)
-            result = {
-                'analysis': 'machine_component_correlation',
-                'machine_id': machine_id,
-                'component': component,
-                'failure_count': count
-            }
-            print(json.dumps(result))
-            
-        elif analysis_type == 'critical_downtime':
-            # Critical downtime incidents
-            downtimes = [float(v) for v in values]
-            result = {
-                'analysis': 'critical_downtime_incidents',
-                'machine_id': identifier,
-                'total_critical_hours': sum(downtimes),
-                'incident_count': len(downtimes),
-                'max_critical_hours': max(downtimes)
-            }
+        result = self.current_analysis.finalize(self.current_identifier, state)
+        if result is None:
+            return
+        if self.outputs:
+            self.outputs.write(self.current_analysis.name, json.dumps(result))
+        else:
             print(json.dumps(result))
     
+    def flush(self):
+        """Emit the finished key"""
+        if self.combine:
+            self.emit_partial(self.current_key, self.current_state)
+        else:
+            self.emit_result(self.current_key, self.current_state)
+    
     def reduce(self):
         """Main reducer function"""
         for line in sys.stdin:
@@ -128,26 +100,57 @@ class MaintenanceLogReducer:
             parts = line.split('\t')
             if len(parts) < 2:
                 continue
-                
-            key = '\t'.join(parts[:-1])
-            value = parts[-1]
+            
+            # Hint field of partitioner.py: part of the key (kept by the combiner), not of the analysis
+            first = 1 if parts[0].startswith(HINT_PREFIX) else 0
+            analysis = ANALYSES.get(parts[first])
+            if analysis is None:
+                # Unknown analysis type: skip its records
+                continue
+            if analysis.secondary_sort and len(parts) > first + 3:
+                # Group on analysis and identifier; the order field goes with the value
+                split = first + 2
+            else:
+                split = len(parts) - 1
+            key = '\t'.join(parts[:split])
+            value = '\t'.join(parts[split:])
+            
+            if self.combine and not analysis.combinable:
+                # Pass through, keeping the sort order of the combiner output
+                if self.current_key is not None:
+                    self.flush()
+                    self.current_key = None
+                print(line)
+                continue
             
             if self.current_key == key:
-                self.current_values.append(value)
+                self.current_state = analysis.merge(self.current_state, analysis.parse(value))
             else:
                 if self.current_key is not None:
-                    self.emit_result(self.current_key, self.current_values)
-                
+                    self.flush()
                 self.current_key = key
-                self.current_values = [value]
+                self.current_analysis = analysis
+                self.current_identifier = parts[first + 1] if split > first + 1 else 'unknown'
+                self.current_state = analysis.parse(value)
         
         # Process the last group
         if self.current_key is not None:
-            self.emit_result(self.current_key, self.current_values)
+            self.flush()
+        if self.outputs:
+            self.outputs.close()
 
 def main():
     """Main reducer execution"""
-    reducer = MaintenanceLogReducer()
+    parser = argparse.ArgumentParser(description="Maintenance log reducer")
+    parser.add_argument('--combine', action='store_true',
+                        help="Combiner mode: merge values per key into partial records instead of JSON results")
+    parser.add_argument('--output-dir', metavar='DIR',
+                        help="Write the results of every analysis to DIR/<analysis>/part-NNNNN "
+                             "instead of stdout (local path or hdfs:// URI)")
+    args = parser.parse_args()
+    
+    outputs = MultipleOutputs(args.output_dir) if args.output_dir and not args.combine else None
+    reducer = MaintenanceLogReducer(combine=args.combine, outputs=outputs)
     reducer.reduce()
 
 if __name__ == "__main__":
@@ -4,31 +4,50 @@
 # Configuration
 INPUT_DIR="/user/input/maintenance_logs"
 OUTPUT_DIR="/user/output/maintenance_analysis"
+RESULTS_DIR="/user/output/maintenance_analysis_results"   # one directory per analysis
+NUM_REDUCERS=12
 HADOOP_STREAMING_JAR="$HADOOP_HOME/share/hadoop/tools/lib/hadoop-streaming-*.jar"
 
 # Clean up previous output
 hdfs dfs -rm -r $OUTPUT_DIR 2>/dev/null
+hdfs dfs -rm -r $RESULTS_DIR 2>/dev/null
 
 # Copy input data to HDFS
 hdfs dfs -mkdir -p $INPUT_DIR
 hdfs dfs -put maintenance_logs.txt $INPUT_DIR/
 
+# Which reducers every analysis goes to
+python3 partitioner.py --reducers $NUM_REDUCERS
+
 # Run MapReduce job
+# Key = partition hint + analysis type + identifier + failure time (4 fields, the time
+# sorts failure_interval records); the hint field alone picks the reducer, so every
+# analysis gets its own reducers (see partitioner.py).
+# The combiner merges partial aggregates; the reducers write $RESULTS_DIR/<analysis>/part-NNNNN.
 hadoop jar $HADOOP_STREAMING_JAR \
-    -files mapper.py,reducer.py \
-    -mapper "python3 mapper.py" \
-    -reducer "python3 reducer.py" \
+    -D stream.num.map.output.key.fields=4 \
+    -D mapreduce.partition.keypartitioner.options=-k1,1 \
+    -D mapreduce.job.reduces=$NUM_REDUCERS \
+    -D mapreduce.reduce.speculative=false \
+    -files mapper.py,reducer.py,analyses.py,tdigest.py,partitioner.py,../../common/timestamp_buckets.py,../../common/java_hash.py \
+    -partitioner org.apache.hadoop.mapred.lib.KeyFieldBasedPartitioner \
+    -mapper "python3 mapper.py --combine --partition-hints $NUM_REDUCERS" \
+    -combiner "python3 reducer.py --combine" \
+    -reducer "python3 reducer.py --output-dir hdfs://$RESULTS_DIR" \
     -input $INPUT_DIR \
     -output $OUTPUT_DIR
 
 # View results
 echo "Analysis Results:"
-hdfs dfs -cat $OUTPUT_DIR/part-00000 | head -50
+hdfs dfs -ls $RESULTS_DIR
+hdfs dfs -cat $RESULTS_DIR/machine_downtime/part-* | head -20
 
 # Copy results back to local filesystem
-hdfs dfs -get $OUTPUT_DIR/part-00000 maintenance_analysis_results.json
+rm -rf maintenance_analysis_results
+hdfs dfs -get $RESULTS_DIR maintenance_analysis_results
+cat maintenance_analysis_results/*/part-* > maintenance_analysis_results.json
 
-echo "Results saved to maintenance_analysis_results.json"
+echo "Results saved to maintenance_analysis_results/ (one directory per analysis) and maintenance_analysis_results.json"
 
 # View json data results
 cat maintenance_analysis_results.json  | head -50
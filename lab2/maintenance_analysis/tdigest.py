@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Mergeable quantile sketch (merging t-digest, Dunning & Ertl) for the
+downtime analyses.
+
+A digest summarizes any number of values in at most about `compression`
+centroids (mean, weight). Centroids near the median may hold many values,
+those near the tails only a few, so p95/p99 stay accurate while memory per
+key is bounded. Digests built by different mappers or combiners merge into
+one digest of all their values:
+
+    digest = TDigest()
+    for duration in durations:
+        digest.add(duration)
+    other = TDigest.from_string(text)      # e.g. from a partial record
+    digest.merge(other)
+    digest.quantile(0.95)
+    digest.to_string()                     # 'low;high;mean:weight;mean:weight;...'
+
+New values and merged centroids are buffered and folded in (sorted and
+merged under the k1 scale function) when the buffer fills up or a result is
+needed.
+"""
+
+import math
+
+
+class TDigest:
+    """
+    Merging t-digest with the k1 (arcsine) scale function.
+    """
+
+    __slots__ = ('compression', 'means', 'weights', 'buffer', 'total', 'low', 'high')
+
+    BUFFER_FACTOR = 5   # buffered centroids per unit of compression before folding in
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.means = []       # centroid means, ascending
+        self.weights = []     # centroid weights
+        self.buffer = []      # (mean, weight) not yet folded in
+        self.total = 0        # total weight
+        self.low = math.inf   # smallest value seen
+        self.high = -math.inf # largest value seen
+
+    def add(self, value, weight=1):
+        """Add one value (or a centroid of the given weight)"""
+        self.buffer.append((value, weight))
+        self.total += weight
+        if value < self.low:
+            self.low = value
+        if value > self.high:
+            self.high = value
+        if len(self.buffer) >= self.BUFFER_FACTOR * self.compression:
+            self.compress()
+
+    def merge(self, other):
+        """Add all values of another digest; returns self"""
+        if not other.total:
+            return self
+        self.buffer.extend(zip(other.means, other.weights))
+        self.buffer.extend(other.buffer)
+        self.total += other.total
+        if other.low < self.low:
+            self.low = other.low
+        if other.high > self.high:
+            self.high = other.high
+        if len(self.buffer) >= self.BUFFER_FACTOR * self.compression:
+            self.compress()
+        return self
+
+    def scale(self, q):
+        """k1 scale function: k(q) = compression / (2 pi) * asin(2q - 1)"""
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def q_limit(self, q):
+        """Largest quantile a centroid starting at q may reach (k grows by at most 1)"""
+        k = self.scale(q) + 1
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+
+    def compress(self):
+        """Fold the buffer into the centroids"""
+        if not self.buffer:
+            return
+        centroids = sorted(list(zip(self.means, self.weights)) + self.buffer)
+        self.buffer = []
+        total = self.total
+        means, weights = [], []
+        mean, weight = centroids[0]
+        done = 0                       # weight of the finished centroids
+        limit = self.q_limit(0.0)
+        for value, value_weight in centroids[1:]:
+            if (done + weight + value_weight) / total <= limit:
+                weight += value_weight
+                mean += (value - mean) * value_weight / weight
+            else:
+                means.append(mean)
+                weights.append(weight)
+                done += weight
+                limit = self.q_limit(done / total)
+                mean, weight = value, value_weight
+        means.append(mean)
+        weights.append(weight)
+        self.means, self.weights = means, weights
+
+    def quantile(self, q):
+        """
+        Estimated q-quantile (0 <= q <= 1), or None for an empty digest.
+        Interpolates linearly between centroid centers, with the smallest and
+        largest value as end points.
+        """
+        if not self.total:
+            return None
+        self.compress()
+        means, weights = self.means, self.weights
+        if len(means) == 1:
+            return means[0]
+        position = q * self.total
+        previous_position, previous_value = 0.0, self.low
+        done = 0
+        for mean, weight in zip(means, weights):
+            center = done + weight / 2
+            if position < center:
+                break
+            previous_position, previous_value = center, mean
+            done += weight
+        else:
+            center, mean = self.total, self.high
+        if center <= previous_position:
+            return mean
+        fraction = (position - previous_position) / (center - previous_position)
+        return previous_value + fraction * (mean - previous_value)
+
+    def to_string(self):
+        """Centroids as 'mean:weight;...' (smallest and largest value first)"""
+        self.compress()
+        centroids = ';'.join(f"{mean!r}:{weight!r}" for mean, weight in zip(self.means, self.weights))
+        return f"{self.low!r};{self.high!r};{centroids}"
+
+    @classmethod
+    def from_string(cls, text, compression=100):
+        """Digest from to_string() output"""
+        digest = cls(compression)
+        low, high, *centroids = text.split(';')
+        for centroid in filter(None, centroids):
+            mean, weight = centroid.split(':')
+            digest.means.append(float(mean))
+            digest.weights.append(int(weight) if weight.isdigit() else float(weight))
+        digest.total = sum(digest.weights)
+        digest.low, digest.high = float(low), float(high)
+        return digest
+
+    def __len__(self):
+        return len(self.means) + len(self.buffer)
@@ -1,20 +1,51 @@
 #!/usr/bin/env python3
 import sys
+import os
 import re
+import argparse
+
+# counting.py comes from ../../common locally and from -files on the cluster
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.extend([HERE, os.path.join(HERE, '..', '..', 'common')])
+from counting import InMapperCombiner
+
 
 def clean_word(word):
     # Remove punctuation and convert to lowercase
     return re.sub(r'[^\w]', '', word.lower())
 
-for line in sys.stdin:
-    try:
-        line = line.strip()
-        words = line.split()
-        for word in words:
-            clean = clean_word(word)
-            if clean:  # Only emit non-empty words
-                print(f"{clean}\t1")
-    except Exception as e:
-        # Log errors to stderr
-        sys.stderr.write(f"Error processing line: {e}\n")
-        continue
\ No newline at end of file
+
+def main():
+    parser = argparse.ArgumentParser(description="Word count mapper")
+    parser.add_argument('--combine', action='store_true',
+                        help="In-mapper combining: emit partial counts instead of word<TAB>1")
+    parser.add_argument('--memory-mb', type=float, default=64,
+                        help="Memory budget of the combining table in MB (default: 64)")
+    parser.add_argument('--evict', choices=['oldest', 'heaviest'], default='oldest',
+                        help="Entries flushed when the budget is hit (default: oldest)")
+    args = parser.parse_args()
+
+    combiner = InMapperCombiner(args.memory_mb, args.evict) if args.combine else None
+
+    for line in sys.stdin:
+        try:
+            line = line.strip()
+            words = line.split()
+            for word in words:
+                clean = clean_word(word)
+                if clean:  # Only emit non-empty words
+                    if combiner:
+                        combiner.add(clean)
+                    else:
+                        print(f"{clean}\t1")
+        except Exception as e:
+            # Log errors to stderr
+            sys.stderr.write(f"Error processing line: {e}\n")
+            continue
+
+    if combiner:
+        combiner.flush()
+
+
+if __name__ == "__main__":
+    main()
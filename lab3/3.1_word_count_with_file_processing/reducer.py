@@ -1,20 +1,72 @@
 #!/usr/bin/env python3
 import sys
-from collections import defaultdict
+import os
+import argparse
 
-word_counts = defaultdict(int)
+# counting.py comes from ../../common locally and from -files on the cluster
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.extend([HERE, os.path.join(HERE, '..', '..', 'common')])
+from counting import SpillingCounter
 
-for line in sys.stdin:
-    try:
-        line = line.strip()
-        if not line:
+
+def parse_lines(lines):
+    """(word, count) pairs; malformed lines are reported and skipped"""
+    for line in lines:
+        try:
+            line = line.strip()
+            if not line:
+                continue
+            word, count = line.split('\t')
+            yield word, int(count)
+        except ValueError:
+            sys.stderr.write(f"Invalid line format: {line}\n")
             continue
-        word, count = line.split('\t')
-        word_counts[word] += int(count)
-    except ValueError:
-        sys.stderr.write(f"Invalid line format: {line}\n")
-        continue
-
-# Output sorted results
-for word in sorted(word_counts.keys()):
-    print(f"{word}\t{word_counts[word]}")
\ No newline at end of file
+
+
+def stream_reduce(lines):
+    """Sorted input, as Hadoop delivers it: one running total, O(1) state"""
+    current_word = None
+    current_count = 0
+
+    for word, count in parse_lines(lines):
+        if word == current_word:
+            current_count += count
+        else:
+            if current_word is not None:
+                print(f"{current_word}\t{current_count}")
+            current_word = word
+            current_count = count
+
+    if current_word is not None:
+        print(f"{current_word}\t{current_count}")
+
+
+def hash_reduce(lines, memory_mb):
+    """Any input order, e.g. unsorted local pipes: hash table that spills to disk"""
+    word_counts = SpillingCounter(memory_mb)
+
+    for word, count in parse_lines(lines):
+        word_counts.add(word, count)
+
+    # Output sorted results
+    for word, count in word_counts.items(sort=True):
+        print(f"{word}\t{count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Word count reducer")
+    parser.add_argument('--mode', choices=['hash', 'stream'], default='hash',
+                        help="stream: input sorted by word (Hadoop), O(1) memory; "
+                             "hash: any order, table spills to disk (default)")
+    parser.add_argument('--memory-mb', type=float, default=64,
+                        help="Memory budget of the hash table in MB (default: 64)")
+    args = parser.parse_args()
+
+    if args.mode == 'stream':
+        stream_reduce(sys.stdin)
+    else:
+        hash_reduce(sys.stdin, args.memory_mb)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,28 @@
 #!/usr/bin/env python3
 import sys
+import argparse
 
-for line in sys.stdin:
-    try:
-        line = line.strip()
-        date, temperature = line.split('\t')
-        year = date.split('-')[0]
-        print(f"{year}\t{temperature}")
-    except ValueError:
-        continue
\ No newline at end of file
+
+def main():
+    parser = argparse.ArgumentParser(description="Temperature mapper")
+    parser.add_argument('--stats', action='store_true',
+                        help="Emit every temperature under its year and its year-month (YYYY-MM) "
+                             "for the statistics of reducer.py --stats")
+    args = parser.parse_args()
+
+    for line in sys.stdin:
+        try:
+            line = line.strip()
+            date, temperature = line.split('\t')
+            year = date.split('-')[0]
+            if args.stats:
+                print(f"{year}\t{temperature}")
+                print(f"{date[:7]}\t{temperature}")
+            else:
+                print(f"{year}\t{temperature}")
+        except ValueError:
+            continue
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,142 @@
 #!/usr/bin/env python3
 import sys
+import argparse
 
-current_year = None
-max_temp = float('-inf')
-
-for line in sys.stdin:
-    try:
-        line = line.strip()
-        year, temp = line.split('\t')
-        temp = int(temp)
-        
-        if current_year == year:
-            max_temp = max(max_temp, temp)
+PARTIAL_PREFIX = 'S|'
+
+
+class RunningStats:
+    """
+    Mergeable summary of a stream of numbers: count, mean, M2 (sum of
+    squared deviations from the mean), min and max. Values are added with
+    Welford's update and summaries are merged with Chan et al.'s pairwise
+    formula, so no value list is kept and the variance stays accurate for
+    large counts. Partial records (combiner output) look like
+    S|count|mean|M2|min|max.
+    """
+
+    __slots__ = ('count', 'mean', 'm2', 'low', 'high')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.low = float('inf')
+        self.high = float('-inf')
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.low:
+            self.low = value
+        if value > self.high:
+            self.high = value
+
+    def merge(self, other):
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.low = min(self.low, other.low)
+        self.high = max(self.high, other.high)
+
+    def add_text(self, value):
+        """Add a raw temperature or merge a partial record"""
+        if value.startswith(PARTIAL_PREFIX):
+            self.merge(self.parse(value))
         else:
-            if current_year:
-                print(f"{current_year}\t{max_temp}")
-            current_year = year
-            max_temp = temp
-    except ValueError:
-        continue
-
-if current_year:
-    print(f"{current_year}\t{max_temp}")
\ No newline at end of file
+            self.add(int(value))
+
+    @classmethod
+    def parse(cls, text):
+        stats = cls()
+        count, mean, m2, low, high = text[len(PARTIAL_PREFIX):].split('|')
+        stats.count, stats.mean, stats.m2 = int(count), float(mean), float(m2)
+        stats.low, stats.high = int(low), int(high)
+        return stats
+
+    def serialize(self):
+        return f"{PARTIAL_PREFIX}{self.count}|{self.mean!r}|{self.m2!r}|{self.low}|{self.high}"
+
+    def variance(self):
+        """Sample variance (0 for a single value)"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+
+def emit_stats(key, stats, combine):
+    if not stats.count:
+        return  # every value of the key was malformed
+    if combine:
+        print(f"{key}\t{stats.serialize()}")
+    else:
+        print(f"{key}\t{stats.count}\t{stats.low}\t{stats.high}\t{stats.mean:.2f}\t{stats.variance():.2f}")
+
+
+def reduce_stats(combine=False):
+    """key<TAB>count<TAB>min<TAB>max<TAB>mean<TAB>variance per key (or partials when combining)"""
+    current_key = None
+    stats = None
+
+    for line in sys.stdin:
+        try:
+            line = line.strip()
+            key, value = line.split('\t')
+
+            if current_key != key:
+                if current_key:
+                    emit_stats(current_key, stats, combine)
+                current_key = key
+                stats = RunningStats()
+            stats.add_text(value)
+        except ValueError:
+            continue
+
+    if current_key:
+        emit_stats(current_key, stats, combine)
+
+
+def reduce_max():
+    current_year = None
+    max_temp = float('-inf')
+
+    for line in sys.stdin:
+        try:
+            line = line.strip()
+            year, temp = line.split('\t')
+            temp = int(temp)
+            
+            if current_year == year:
+                max_temp = max(max_temp, temp)
+            else:
+                if current_year:
+                    print(f"{current_year}\t{max_temp}")
+                current_year = year
+                max_temp = temp
+        except ValueError:
+            continue
+
+    if current_year:
+        print(f"{current_year}\t{max_temp}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temperature reducer")
+    parser.add_argument('--stats', action='store_true',
+                        help="Count, min, max, mean and variance per key instead of the maximum")
+    parser.add_argument('--combine', action='store_true',
+                        help="Combiner mode of --stats: merge the values of each key into one partial record")
+    args = parser.parse_args()
+
+    if args.stats or args.combine:
+        reduce_stats(combine=args.combine)
+    else:
+        reduce_max()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Columnar binary store for the weather series (weather_data.txt).
+
+`convert` writes the dated temperatures sorted by date into one file of
+fixed-width columns that can be memory-mapped and queried without parsing:
+
+    header   magic 'WCOL1', row count, year count            (24 bytes)
+    years    int32 per year                                   (padded to 8 bytes)
+    offsets  int64 per year + 1: first row of every year, then the row count
+    days     int32 per row: days since 1970-01-01             (padded to 8 bytes)
+    temps    int16 per row: temperature in degrees Celsius
+
+All numbers are little-endian. `query` maps the file, narrows the rows with
+the year index and a binary search on the day column, and reports count,
+min, max and mean of the range; with NumPy installed the statistics run
+vectorised over the mapped columns, otherwise over memoryviews of them.
+
+    python3 weather_store.py convert weather_data.txt weather.wcol
+    python3 weather_store.py query weather.wcol --from 2021-03-01 --to 2021-05-31
+    python3 weather_store.py query weather.wcol --year 2022
+"""
+
+import argparse
+import bisect
+import mmap
+import struct
+import sys
+import time
+from array import array
+from datetime import date, timedelta
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MAGIC = b'WCOL1\0\0\0'
+HEADER = struct.Struct('<8sQQ')
+EPOCH = date(1970, 1, 1).toordinal()
+INT16_RANGE = (-32768, 32767)
+
+
+def day_number(text):
+    """'YYYY-MM-DD' -> days since 1970-01-01"""
+    return date.fromisoformat(text).toordinal() - EPOCH
+
+
+def day_text(number):
+    return (date(1970, 1, 1) + timedelta(days=number)).isoformat()
+
+
+def padding(size):
+    return b'\0' * (-size % 8)
+
+
+def read_series(path):
+    """(day number, temperature) pairs of a weather_data.txt file, sorted by day"""
+    rows = []
+    skipped = 0
+    with open(path) as f:
+        for line in f:
+            try:
+                text, temperature = line.strip().split('\t')
+                temperature = int(temperature)
+                if not INT16_RANGE[0] <= temperature <= INT16_RANGE[1]:
+                    raise ValueError(temperature)
+                rows.append((day_number(text), temperature))
+            except ValueError:
+                skipped += 1
+    if skipped:
+        print(f"Skipped {skipped} malformed lines", file=sys.stderr)
+    rows.sort()
+    return rows
+
+
+def write_store(rows, path):
+    """Write sorted (day, temperature) rows as a columnar store"""
+    days = array('i', (day for day, _ in rows))
+    temps = array('h', (temperature for _, temperature in rows))
+    years = array('i')
+    offsets = array('q')
+    for row, day in enumerate(days):
+        year = (date(1970, 1, 1) + timedelta(days=day)).year
+        if not years or years[-1] != year:
+            years.append(year)
+            offsets.append(row)
+    offsets.append(len(days))
+    if sys.byteorder != 'little':
+        for column in (days, temps, years, offsets):
+            column.byteswap()
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(days), len(years)))
+        for column in (years, offsets, days):
+            data = column.tobytes()
+            f.write(data)
+            f.write(padding(len(data)))
+        f.write(temps.tobytes())
+
+
+class WeatherStore:
+    """
+    Read-only view of a store file: years, offsets, days and temps are
+    memoryviews (or NumPy arrays) over the mapped file, nothing is copied.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.rows, num_years = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a weather store")
+        if sys.byteorder != 'little':
+            raise ValueError("weather stores are little-endian; this machine is not")
+        position = HEADER.size
+        self.years, position = self.column(position, 'i', num_years)
+        self.offsets, position = self.column(position, 'q', num_years + 1)
+        self.days, position = self.column(position, 'i', self.rows)
+        self.temps, position = self.column(position, 'h', self.rows)
+
+    def column(self, position, typecode, count):
+        """Typed view of count values at position; returns it and the next 8-byte aligned position"""
+        size = array(typecode).itemsize * count
+        view = memoryview(self.map)[position:position + size].cast(typecode)
+        return view, position + size + len(padding(size))
+
+    def row_range(self, first_day, last_day):
+        """Rows [start, stop) with first_day <= day <= last_day"""
+        years = list(self.years)
+        first_year = (date(1970, 1, 1) + timedelta(days=first_day)).year
+        last_year = (date(1970, 1, 1) + timedelta(days=last_day)).year
+        # Year index first, then binary search inside the years' rows
+        low = self.offsets[bisect.bisect_left(years, first_year)]
+        high = self.offsets[bisect.bisect_right(years, last_year)]
+        start = bisect.bisect_left(self.days, first_day, low, high)
+        stop = bisect.bisect_right(self.days, last_day, start, high)
+        return start, stop
+
+    def summary(self, first_day, last_day):
+        """(count, min, max, mean) of the temperatures in a day range, or None"""
+        start, stop = self.row_range(first_day, last_day)
+        if start >= stop:
+            return None
+        if numpy is not None:
+            temps = numpy.frombuffer(self.temps, dtype='<i2')[start:stop]
+            return stop - start, int(temps.min()), int(temps.max()), float(temps.mean(dtype='f8'))
+        temps = self.temps[start:stop]
+        return stop - start, min(temps), max(temps), sum(temps) / (stop - start)
+
+    def close(self):
+        for view in (self.years, self.offsets, self.days, self.temps):
+            view.release()
+        self.map.close()
+
+
+def convert(args):
+    rows = read_series(args.source)
+    write_store(rows, args.target)
+    print(f"Wrote {len(rows)} rows to {args.target}")
+
+
+def query(args):
+    if args.year:
+        if args.first or args.last:
+            raise ValueError("--year cannot be combined with --from/--to")
+        first, last = f"{args.year}-01-01", f"{args.year}-12-31"
+    else:
+        first, last = args.first, args.last
+    store = WeatherStore(args.store)
+    try:
+        if not store.rows:
+            raise ValueError(f"{args.store} is an empty store")
+        first_day = day_number(first) if first else store.days[0]
+        last_day = day_number(last) if last else store.days[-1]
+        start = time.perf_counter()
+        result = store.summary(first_day, last_day)
+        elapsed = (time.perf_counter() - start) * 1000
+    finally:
+        store.close()
+    if result is None:
+        print(f"No data from {day_text(first_day)} to {day_text(last_day)}")
+        return
+    count, low, high, mean = result
+    print(f"{day_text(first_day)}..{day_text(last_day)}\tcount={count}\tmin={low}\tmax={high}"
+          f"\tmean={mean:.2f}\t({elapsed:.2f} ms{', numpy' if numpy is not None else ''})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar store and range queries for weather_data.txt")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('convert', help="Write a store from weather_data.txt")
+    command.add_argument('source', help="Tab-separated date and temperature lines")
+    command.add_argument('target', help="Store file to write")
+    command.set_defaults(run=convert)
+
+    command = commands.add_parser('query', help="Count, min, max and mean of a date range")
+    command.add_argument('store', help="Store file written by convert")
+    command.add_argument('--from', dest='first', metavar='YYYY-MM-DD', help="First day (default: first in store)")
+    command.add_argument('--to', dest='last', metavar='YYYY-MM-DD', help="Last day (default: last in store)")
+    command.add_argument('--year', type=int, help="Whole calendar year instead of --from/--to")
+    command.set_defaults(run=query)
+
+    args = parser.parse_args()
+    try:
+        args.run(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,20 @@
 #!/usr/bin/env python3
 import sys
-import csv
+import os
 
-# Skip header
-header_skipped = False
+# csv_input.py comes from ../../common locally and from -files on the cluster
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.extend([HERE, os.path.join(HERE, '..', '..', 'common')])
+from csv_input import CSVInput
 
-for line in sys.stdin:
-    if not header_skipped:
-        header_skipped = True
-        continue
+# Header rows are recognised by content, so every split keeps its first row
+rows = CSVInput(('Date', 'Product', 'Region', 'Quantity', 'Price'), (str, str, str, int, int))
+
+for date, product, region, quantity, price in rows:
+    total_sale = quantity * price
+    
+    # Emit region-based aggregation
+    print(f"region_{region}\t{total_sale}")
     
-    try:
-        row = next(csv.reader([line.strip()]))
-        if len(row) == 5:
-            date, product, region, quantity, price = row
-            total_sale = int(quantity) * int(price)
-            
-            # Emit region-based aggregation
-            print(f"region_{region}\t{total_sale}")
-            
-            # Emit product-based aggregation
-            print(f"product_{product}\t{total_sale}")
-    except:
-        continue
\ No newline at end of file
+    # Emit product-based aggregation
+    print(f"product_{product}\t{total_sale}")
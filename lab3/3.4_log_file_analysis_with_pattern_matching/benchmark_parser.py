@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark of Common Log Format parsers for mapper.py.
+
+Runs generate_logs.py (50k lines) in a temporary directory, repeats its
+output up to --lines (with a few odd lines every 100k that the regex
+rejects or that need care), and times parsing every line with
+
+    re.match     re.match() with the pattern string, as the mapper used to
+    tokenizer    str.split on the spaces and checks of every token, with the compiled
+                 regex as fallback for lines that do not have the usual shape
+    ClfParser    the mapper's parser: compiled regex, hour cut out with str.find
+
+checking that all of them give the same record for every line. Lines are
+streamed from disk, so the 100M-line run needs only disk space (about 10 GB):
+
+    python3 benchmark_parser.py                      # 1M lines
+    python3 benchmark_parser.py --lines 100000000 --repeats 1
+"""
+
+import argparse
+import itertools
+import os
+import re
+import string
+import subprocess
+import sys
+import tempfile
+import time
+
+from mapper import ClfParser
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# The mapper's original pattern string, matched per line
+log_pattern = r'(\S+) \S+ \S+ \[([\w:/]+\s[+\-]\d{4})\] "(\S+) (\S+) \S+" (\d+) (\d+)'
+TIMESTAMP_CHARS = string.ascii_letters + string.digits + ':/_'   # [\w:/] for ASCII
+
+ODD_LINES = [
+    '192.168.1.7 - - [01/Jan/2023:00:00:00 +0000] "GET /home HTTP/1.1" 200 - "-" "Mozilla/5.0"',
+    '192.168.1.7 - - [01/Jan/2023:00:00:00 +0000] "GET /caf\u00e9 HTTP/1.1" 200 512 "-" "Mozilla/5.0"',
+    '192.168.1.7 - - [01/Jan/2023:00:00:00 +0000] "GET /home HTTP/1.1" 200 512abc',
+    '192.168.1.7 - - [01/Jan/2023:00:00:00 +0000] "GET /home HTTP/1.1" 200 512\t"-"',
+    '192.168.1.7 - - [01/Jan/2023:00:00:00 +0000] "-" 408 0',
+    'garbage line',
+]
+
+
+class RegexParser:
+    """The mapper's original parsing: re.match per line, hour from split"""
+
+    def parse(self, line):
+        match = re.match(log_pattern, line)
+        if match:
+            ip, timestamp, method, url, status, size = match.groups()
+            return ip, timestamp, method, url, int(status), int(size), timestamp.split(':')[1]
+        return None
+
+
+class TokenParser(ClfParser):
+    """
+    Hand-rolled tokenizer: printable ASCII lines are split at their spaces and
+    the tokens checked against the shape the regex expects; anything else
+    goes to the compiled regex, so records are identical.
+    """
+
+    def parse(self, line):
+        if line.isascii() and line.isprintable():
+            parts = line.split(' ', 10)
+            if len(parts) >= 10:
+                ip, ident, user, stamp, zone, method, url, protocol, status, size = parts[:10]
+                if (ip and ident and user and url and len(stamp) > 1 and stamp[0] == '['
+                        and not stamp[1:].strip(TIMESTAMP_CHARS) and len(zone) == 6 and zone[5] == ']'
+                        and zone[0] in '+-' and zone[1:5].isdigit() and len(method) > 1 and method[0] == '"'
+                        and len(protocol) > 1 and protocol[-1] == '"' and status.isdigit() and size.isdigit()):
+                    fields = stamp.split(':', 2)
+                    if len(fields) > 1:
+                        return (ip, f"{stamp[1:]} {zone[:5]}", method[1:], url, int(status), int(size), fields[1])
+        return super().parse(line)
+
+
+def write_logs(directory, num_lines):
+    """generate_logs.py output repeated up to num_lines, plus odd lines"""
+    subprocess.run([sys.executable, os.path.join(HERE, 'generate_logs.py')], cwd=directory, check=True)
+    with open(os.path.join(directory, 'access.log')) as f:
+        sample = f.read().splitlines()
+    path = os.path.join(directory, 'access_scaled.log')
+    with open(path, 'w') as f:
+        buf = []
+        for i, line in enumerate(itertools.islice(itertools.cycle(sample), num_lines)):
+            if i % 100000 == 0:
+                buf.extend(ODD_LINES)
+            buf.append(line)
+            if len(buf) >= 100000:
+                f.write('\n'.join(buf) + '\n')
+                buf = []
+        if buf:
+            f.write('\n'.join(buf) + '\n')
+    return path
+
+
+def time_parser(path, make_parser, repeats):
+    """Best wall time of parsing every stripped line of path with a fresh parser"""
+    best = None
+    for _ in range(repeats):
+        parser = make_parser()
+        with open(path) as f:
+            start = time.perf_counter()
+            for line in f:
+                parser.parse(line.strip())
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def same_records(path):
+    """True if every parser returns the original record for every line; also the mapper's parser"""
+    original, parsers = RegexParser(), [ClfParser(), TokenParser()]
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            expected = original.parse(line)
+            if any(parser.parse(line) != expected for parser in parsers):
+                return False, parsers[0]
+    return True, parsers[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Common Log Format parsers")
+    parser.add_argument('--lines', type=int, default=1000000, help="Log lines (default: 1000000)")
+    parser.add_argument('--repeats', type=int, default=3, help="Runs per parser (default: 3)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_logs(tmp, args.lines)
+        size_mb = os.path.getsize(path) / 1e6
+        timings = [(label, time_parser(path, make_parser, args.repeats))
+                   for label, make_parser in [('re.match', RegexParser), ('tokenizer', TokenParser),
+                                              ('ClfParser', ClfParser)]]
+        same, counters = same_records(path)
+
+    print(f"input: {args.lines} lines, {size_mb:.0f} MB")
+    baseline = timings[0][1]
+    for label, elapsed in timings:
+        print(f"{label + ':':11} {elapsed:7.2f} s  ({args.lines / elapsed / 1e6:.2f} M lines/s, "
+              f"{baseline / elapsed:.1f}x)")
+    print(f"malformed: {counters.malformed} lines")
+    print(f"records identical: {same}")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
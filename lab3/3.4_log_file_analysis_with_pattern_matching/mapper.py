@@ -1,32 +1,98 @@
 #!/usr/bin/env python3
 import sys
+import os
 import re
+import argparse
+
+# counting.py comes from ../../common locally and from -files on the cluster
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.extend([HERE, os.path.join(HERE, '..', '..', 'common')])
+from counting import InMapperCombiner
 
 # Common Log Format regex
-log_pattern = r'(\S+) \S+ \S+ \[([\w:/]+\s[+\-]\d{4})\] "(\S+) (\S+) \S+" (\d+) (\d+)'
-
-for line in sys.stdin:
-    try:
-        line = line.strip()
-        match = re.match(log_pattern, line)
-        
-        if match:
-            ip, timestamp, method, url, status, size = match.groups()
-            status = int(status)
-            size = int(size)
-            
-            # Extract hour from timestamp
-            hour = timestamp.split(':')[1]
-            
-            # Emit different types of analysis
-            print(f"page_{url}\t1")  # Page hit count
-            print(f"status_{status}\t1")  # Status code count
-            print(f"hour_{hour}\t1")  # Traffic by hour
-            print(f"ip_{ip}\t1")  # Requests by IP
-            
-            if status >= 400:  # Error analysis
-                print(f"error_{url}\t1")
-                
-    except Exception as e:
-        sys.stderr.write(f"Error processing line: {str(e)}\n")
-        continue
\ No newline at end of file
+LOG_PATTERN = re.compile(r'(\S+) \S+ \S+ \[([\w:/]+\s[+\-]\d{4})\] "(\S+) (\S+) \S+" (\d+) (\d+)')
+COUNTER_GROUP = 'LogParser'
+
+
+class ClfParser:
+    """
+    Common Log Format parser: LOG_PATTERN compiled once (re.match with the
+    pattern string looks it up in re's cache on every call) and the hour cut
+    out of the timestamp with str.find. Lines the pattern rejects are
+    counted as malformed.
+    """
+
+    def __init__(self):
+        self.match = LOG_PATTERN.match
+        self.malformed = 0   # lines the pattern rejected
+
+    def parse(self, line):
+        """(ip, timestamp, method, url, status, size, hour) of a stripped line, or None"""
+        if not line:
+            return None
+        match = self.match(line)
+        if match is None:
+            self.malformed += 1
+            return None
+        ip, timestamp, method, url, status, size = match.groups()
+        # Hour: the text between the first and second ':' (timestamp.split(':')[1])
+        colon = timestamp.find(':')
+        if colon < 0:
+            self.malformed += 1
+            return None
+        next_colon = timestamp.find(':', colon + 1)
+        hour = timestamp[colon + 1:next_colon] if next_colon >= 0 else timestamp[colon + 1:]
+        return ip, timestamp, method, url, int(status), int(size), hour
+
+    def report(self):
+        """Parser counters as Hadoop Streaming counters (stderr)"""
+        if self.malformed:
+            sys.stderr.write(f"reporter:counter:{COUNTER_GROUP},MALFORMED_LINES,{self.malformed}\n")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Access log mapper")
+    arg_parser.add_argument('--combine', action='store_true',
+                            help="In-mapper combining: emit partial counts instead of <dimension>_<value><TAB>1")
+    arg_parser.add_argument('--memory-mb', type=float, default=64,
+                            help="Memory budget of the combining table in MB (default: 64)")
+    args = arg_parser.parse_args()
+
+    parser = ClfParser()
+    combiner = InMapperCombiner(args.memory_mb) if args.combine else None
+    write = sys.stdout.write
+
+    for line in sys.stdin:
+        try:
+            line = line.strip()
+            record = parser.parse(line)
+
+            if record:
+                ip, timestamp, method, url, status, size, hour = record
+
+                if combiner:
+                    combiner.add(f"page_{url}")
+                    combiner.add(f"status_{status}")
+                    combiner.add(f"hour_{hour}")
+                    combiner.add(f"ip_{ip}")
+                    if status >= 400:
+                        combiner.add(f"error_{url}")
+                    continue
+
+                # Emit different types of analysis: page hits, status codes, traffic by hour, requests by IP
+                write(f"page_{url}\t1\nstatus_{status}\t1\nhour_{hour}\t1\nip_{ip}\t1\n")
+
+                if status >= 400:  # Error analysis
+                    write(f"error_{url}\t1\n")
+
+        except Exception as e:
+            sys.stderr.write(f"Error processing line: {str(e)}\n")
+            continue
+
+    if combiner:
+        combiner.flush()
+    parser.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Map side of the request-rate analysis: one ip<TAB>epoch-second record per
+request, the second zero-padded to ten digits so that the text sort of the
+shuffle is also the numeric one. With two key fields and partitioning on the
+first, every reducer sees each IP's requests in time order (rate_reducer.py).
+"""
+import sys
+import re
+from datetime import datetime
+from functools import lru_cache
+
+from mapper import ClfParser, COUNTER_GROUP
+
+CLF_TIMESTAMP = re.compile(r'(\d{2}/[A-Za-z]{3}/\d{4}:\d{2}):([0-5]\d):([0-5]\d) ([+\-]\d{4})')
+CLF_FORMAT = '%d/%b/%Y:%H:%M:%S %z'
+
+
+@lru_cache(maxsize=1 << 16)
+def hour_epoch(hour, zone):
+    """Epoch second of 'dd/Mon/yyyy:HH' in zone '+hhmm' (ValueError if invalid)"""
+    return int(datetime.strptime(f"{hour}:00:00 {zone}", CLF_FORMAT).timestamp())
+
+
+def epoch_second(timestamp):
+    """Epoch second of a Common Log Format timestamp; ValueError if it is not one"""
+    match = CLF_TIMESTAMP.fullmatch(timestamp)
+    if match:
+        hour, minute, second, zone = match.groups()
+        return hour_epoch(hour, zone) + int(minute) * 60 + int(second)
+    return int(datetime.strptime(timestamp, CLF_FORMAT).timestamp())
+
+
+def main():
+    parser = ClfParser()
+    write = sys.stdout.write
+    bad_timestamps = 0
+
+    for line in sys.stdin:
+        try:
+            record = parser.parse(line.strip())
+            if record:
+                try:
+                    second = epoch_second(record[1])
+                except ValueError:
+                    second = -1
+                if second < 0:
+                    bad_timestamps += 1
+                    continue
+                write(f"{record[0]}\t{second:010d}\t1\n")
+        except Exception as e:
+            sys.stderr.write(f"Error processing line: {str(e)}\n")
+            continue
+
+    parser.report()
+    if bad_timestamps:
+        sys.stderr.write(f"reporter:counter:{COUNTER_GROUP},BAD_TIMESTAMPS,{bad_timestamps}\n")
+
+
+if __name__ == "__main__":
+    main()
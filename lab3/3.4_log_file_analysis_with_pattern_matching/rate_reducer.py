@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Reduce side of the request-rate analysis: flags IPs with more than
+--threshold requests in any --window seconds.
+
+Input is ip<TAB>epoch-second<TAB>count from rate_mapper.py, sorted by IP and
+second. A sliding window per IP keeps one [second, count] entry per second
+inside the window, so memory is O(window) whatever the number of requests.
+For every offender one line is written:
+
+    ip<TAB>peak requests<TAB>peak requests/s<TAB>window start<TAB>window end
+
+with the window of the first peak, start and end in UTC.
+"""
+import sys
+import argparse
+from collections import deque
+from datetime import datetime, timezone
+
+COUNTER_GROUP = 'RateReducer'
+
+
+def utc_text(second):
+    return datetime.fromtimestamp(second, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class SlidingWindow:
+    """Requests of one IP in the last `window` seconds and the peak so far"""
+
+    def __init__(self, window):
+        self.window = window
+        self.seconds = deque()   # [second, count], oldest first
+        self.count = 0
+        self.peak = 0
+        self.peak_end = None
+
+    def add(self, second, count):
+        seconds = self.seconds
+        if seconds and seconds[-1][0] == second:
+            seconds[-1][1] += count
+        else:
+            seconds.append([second, count])
+        self.count += count
+        # The window ending at `second` covers (second - window, second]
+        while seconds[0][0] <= second - self.window:
+            self.count -= seconds.popleft()[1]
+        if self.count > self.peak:
+            self.peak = self.count
+            self.peak_end = second
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-IP request rate over a sliding window")
+    parser.add_argument('--window', type=int, default=60, help="Window length in seconds (default: 60)")
+    parser.add_argument('--threshold', type=int, required=True,
+                        help="Report IPs with more than this many requests in a window")
+    args = parser.parse_args()
+    if args.window < 1:
+        parser.error("--window must be at least 1")
+
+    current_ip = None
+    window = None
+    last_second = None
+    unsorted = 0
+
+    def report():
+        if window.peak > args.threshold:
+            print(f"{current_ip}\t{window.peak}\t{window.peak / args.window:.2f}"
+                  f"\t{utc_text(window.peak_end - args.window + 1)}\t{utc_text(window.peak_end)}")
+
+    for line in sys.stdin:
+        try:
+            ip, second, count = line.rstrip('\n').split('\t')
+            second = int(second)
+            count = int(count)
+        except ValueError:
+            continue
+
+        if ip != current_ip:
+            if current_ip is not None:
+                report()
+            current_ip = ip
+            window = SlidingWindow(args.window)
+        elif second < last_second:
+            # Needs the secondary sort: two key fields, partitioned on the first
+            unsorted += 1
+            continue
+        window.add(second, count)
+        last_second = second
+
+    if current_ip is not None:
+        report()
+    if unsorted:
+        sys.stderr.write(f"reporter:counter:{COUNTER_GROUP},UNSORTED_RECORDS,{unsorted}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,80 @@
 #!/usr/bin/env python3
 import sys
-import csv
 import os
+import argparse
 
-filename = os.environ.get('mapreduce_map_input_file', '')
-
-for line in sys.stdin:
-    try:
-        row = next(csv.reader([line.strip()]))
-        
-        if 'customer' in filename.lower():
-            # Customer data: customer_id, name, tier, country
-            if len(row) == 4 and row[0] != 'customer_id':
-                customer_id, name, tier, country = row
-                print(f"{customer_id}\tcustomer\t{name}\t{tier}\t{country}")
-        
-        elif 'order' in filename.lower():
-            # Order data: order_id, customer_id, amount, date
-            if len(row) == 4 and row[0] != 'order_id':
-                order_id, customer_id, amount, date = row
-                print(f"{customer_id}\torder\t{order_id}\t{amount}\t{date}")
-    except:
-        continue
\ No newline at end of file
+# csv_input.py comes from ../../common locally and from -files on the cluster
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.extend([HERE, os.path.join(HERE, '..', '..', 'common')])
+from csv_input import CSVInput
+
+CUSTOMER_COLUMNS = ('customer_id', 'name', 'tier', 'country')
+ORDER_COLUMNS = ('order_id', 'customer_id', 'amount', 'date')
+COUNTER_GROUP = 'MapJoin'
+
+
+def load_customers(path):
+    """customer_id -> 'name<TAB>tier<TAB>country', the joined fields as one string per customer"""
+    with open(path, newline='') as f:
+        return {customer_id: f"{name}\t{tier}\t{country}"
+                for customer_id, name, tier, country in CSVInput(CUSTOMER_COLUMNS, stream=f)}
+
+
+def map_join(customers, read_orders=True, all_customers=False):
+    """
+    Orders joined against the customer table in the mapper and summed per
+    customer: one customer_id<TAB>partial<TAB>name<TAB>tier<TAB>country<TAB>
+    count<TAB>total record per customer and mapper, no customer records.
+    With all_customers every customer of the table gets a record (count 0
+    if it has no orders here), so that customers without any orders are
+    reported as in the reduce-side join.
+    """
+    totals = {customer_id: [0, 0] for customer_id in customers} if all_customers else {}
+    unmatched = 0
+    orders = CSVInput(ORDER_COLUMNS, (str, str, int, str)) if read_orders else ()
+    for order_id, customer_id, amount, date in orders:
+        if customer_id not in customers:
+            unmatched += 1
+            continue
+        total = totals.get(customer_id)
+        if total is None:
+            totals[customer_id] = [1, amount]
+        else:
+            total[0] += 1
+            total[1] += amount
+
+    for customer_id, (count, amount) in totals.items():
+        print(f"{customer_id}\tpartial\t{customers[customer_id]}\t{count}\t{amount}")
+    if unmatched:
+        sys.stderr.write(f"reporter:counter:{COUNTER_GROUP},UNMATCHED_ORDERS,{unmatched}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Customer/order join mapper")
+    parser.add_argument('--map-join', metavar='CUSTOMERS_CSV',
+                        help="Join orders in the mapper against this customers file (e.g. shipped with -files) "
+                             "and emit per-customer partial sums; map task 0 also emits empty partials for "
+                             "customers without orders")
+    args = parser.parse_args()
+
+    filename = os.environ.get('mapreduce_map_input_file', '')
+
+    if args.map_join:
+        # The customers come from the lookup table, not from the input. The first map task
+        # also reports the customers without orders, which no other mapper knows about.
+        map_join(load_customers(args.map_join), read_orders='customer' not in filename.lower(),
+                 all_customers=os.environ.get('mapreduce_task_partition', '0') == '0')
+
+    elif 'customer' in filename.lower():
+        # Customer data: customer_id, name, tier, country
+        for customer_id, name, tier, country in CSVInput(CUSTOMER_COLUMNS):
+            print(f"{customer_id}\tcustomer\t{name}\t{tier}\t{country}")
+
+    elif 'order' in filename.lower():
+        # Order data: order_id, customer_id, amount, date
+        for order_id, customer_id, amount, date in CSVInput(ORDER_COLUMNS):
+            print(f"{customer_id}\torder\t{order_id}\t{amount}\t{date}")
+
+
+if __name__ == "__main__":
+    main()
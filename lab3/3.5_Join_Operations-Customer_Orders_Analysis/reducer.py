@@ -1,9 +1,24 @@
 #!/usr/bin/env python3
 import sys
 
+# Records of a customer: customer_id, 'customer', name, tier, country
+#                        customer_id, 'order', order_id, amount, date
+#                        customer_id, 'partial', name, tier, country, count, total   (mapper.py --map-join)
+# Orders are only counted and summed, so nothing is buffered and the order of the
+# records within a customer does not matter. With the record type as second key
+# field the customer record comes first anyway ('customer' < 'order' < 'partial').
+
+
+def emit(customer_id, customer_info, order_count, total_amount):
+    avg_amount = total_amount / order_count if order_count > 0 else 0
+    name, tier, country = customer_info
+    print(f"{customer_id}\t{name}\t{tier}\t{country}\t{order_count}\t{total_amount}\t{avg_amount:.2f}")
+
+
 current_customer_id = None
 customer_info = None
-orders = []
+order_count = 0
+total_amount = 0
 
 for line in sys.stdin:
     try:
@@ -15,31 +30,28 @@ for line in sys.stdin:
         if current_customer_id != customer_id:
             # Process previous customer
             if current_customer_id and customer_info:
-                total_amount = sum(int(order[1]) for order in orders)
-                order_count = len(orders)
-                avg_amount = total_amount / order_count if order_count > 0 else 0
-                
-                name, tier, country = customer_info
-                print(f"{current_customer_id}\t{name}\t{tier}\t{country}\t{order_count}\t{total_amount}\t{avg_amount:.2f}")
+                emit(current_customer_id, customer_info, order_count, total_amount)
             
             # Reset for new customer
             current_customer_id = customer_id
             customer_info = None
-            orders = []
+            order_count = 0
+            total_amount = 0
         
         if record_type == 'customer':
             customer_info = parts[2:5]  # name, tier, country
         elif record_type == 'order':
-            orders.append(parts[2:4])  # order_id, amount
+            total_amount += int(parts[3])  # amount
+            order_count += 1
+        elif record_type == 'partial':
+            count, total = int(parts[5]), int(parts[6])
+            customer_info = parts[2:5]  # name, tier, country
+            order_count += count
+            total_amount += total
             
     except:
         continue
 
 # Process last customer
 if current_customer_id and customer_info:
-    total_amount = sum(int(order[1]) for order in orders)
-    order_count = len(orders)
-    avg_amount = total_amount / order_count if order_count > 0 else 0
-    
-    name, tier, country = customer_info
-    print(f"{current_customer_id}\t{name}\t{tier}\t{country}\t{order_count}\t{total_amount}\t{avg_amount:.2f}")
\ No newline at end of file
+    emit(current_customer_id, customer_info, order_count, total_amount)
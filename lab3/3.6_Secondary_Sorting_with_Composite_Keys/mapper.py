@@ -1,16 +1,14 @@
 #!/usr/bin/env python3
 import sys
-import csv
+import os
 
-for line in sys.stdin:
-    try:
-        row = next(csv.reader([line.strip()]))
-        if len(row) == 5 and row[0] != 'date':
-            date, symbol, time, price, volume = row
-            
-            # Create composite key: symbol_date, and natural key: time
-            # This allows sorting by symbol, then date, then time
-            composite_key = f"{symbol}_{date}"
-            print(f"{composite_key}\t{time}\t{price}\t{volume}")
-    except:
-        continue
\ No newline at end of file
+# csv_input.py comes from ../../common locally and from -files on the cluster
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.extend([HERE, os.path.join(HERE, '..', '..', 'common')])
+from csv_input import CSVInput
+
+for date, symbol, time, price, volume in CSVInput(('date', 'symbol', 'time', 'price', 'volume')):
+    # Create composite key: symbol_date, and natural key: time
+    # This allows sorting by symbol, then date, then time
+    composite_key = f"{symbol}_{date}"
+    print(f"{composite_key}\t{time}\t{price}\t{volume}")
@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 import sys
+import os
 import json
-from datetime import datetime
 import math
 
+# timestamp_buckets.py comes from ../../common locally and from -files on the cluster
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.extend([HERE, os.path.join(HERE, '..', '..', 'common')])
+from timestamp_buckets import hour_bucket
+
 def detect_anomaly(device_type, value):
     """Simple anomaly detection based on device type"""
     thresholds = {
@@ -34,10 +39,10 @@ def main():
             value = float(data['value'])
             battery_level = float(data['battery_level'])
             
-            # Parse timestamp for time-based aggregations
-            dt = datetime.fromisoformat(timestamp)
-            hour = dt.strftime('%Y-%m-%d-%H')
-            day = dt.strftime('%Y-%m-%d')
+            # Time buckets for time-based aggregations, cached per hour
+            bucket = hour_bucket(timestamp)
+            hour = bucket.hour_key
+            day = bucket.day_key
             
             # 1. Hourly averages by location and device type
             print(f"hourly_{location}_{device_type}_{hour}\t{value}")
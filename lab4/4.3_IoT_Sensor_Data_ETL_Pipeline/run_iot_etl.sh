@@ -30,7 +30,7 @@ chmod +x mapper.py reducer.py
 # Run MapReduce job
 echo "Running IoT MapReduce job..."
 hadoop jar $HADOOP_HOME/share/hadoop/tools/lib/hadoop-streaming-*.jar \
-    -files mapper.py,reducer.py \
+    -files mapper.py,reducer.py,../../common/timestamp_buckets.py \
     -mapper mapper.py \
     -reducer reducer.py \
     -input $INPUT_DIR/iot_sensor_data.json \